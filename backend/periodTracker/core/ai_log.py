@@ -0,0 +1,91 @@
+# core/ai_log.py
+# Structured logging of LLM calls (model, latency, status, error class,
+# prompt size in chars and estimated tokens) into AICallLog, plus the
+# summary used by /api/ai/health/.
+
+import logging
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import AICallLog
+
+logger = logging.getLogger(__name__)
+
+
+def record_ai_call(endpoint, model, latency_ms, prompt_chars, response_chars=0, error=None,
+                   prompt_tokens=0, trimmed=()):
+    """
+    Never raises: a logging failure must not break the AI endpoint.
+    """
+    try:
+        AICallLog.objects.create(
+            endpoint=endpoint,
+            model=model,
+            status="error" if error else "ok",
+            error_class=type(error).__name__ if error else "",
+            error_message=str(error)[:500] if error else "",
+            latency_ms=int(latency_ms),
+            prompt_chars=prompt_chars,
+            prompt_tokens=prompt_tokens,
+            trimmed_sections=",".join(trimmed)[:200],
+            response_chars=response_chars,
+        )
+    except Exception:
+        logger.exception("Could not record AI call")
+
+
+def _percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    k = round((len(sorted_vals) - 1) * p / 100)
+    return sorted_vals[k]
+
+
+def summarize(hours=24):
+    """
+    Error rate and latency percentiles per (endpoint, model) for the last `hours`.
+    """
+    since = timezone.now() - timedelta(hours=hours)
+    rows = (
+        AICallLog.objects.filter(created_at__gte=since)
+        .order_by("endpoint", "model", "latency_ms")
+        .values_list("endpoint", "model", "status", "latency_ms", "prompt_tokens", "trimmed_sections")
+    )
+
+    groups = {}
+    for endpoint, model, st, latency, tokens, trimmed in rows:
+        g = groups.setdefault((endpoint, model), {"latencies": [], "errors": 0, "tokens": 0, "trimmed": 0})
+        g["latencies"].append(latency)  # already sorted by the query
+        g["tokens"] += tokens
+        g["trimmed"] += bool(trimmed)
+        if st == "error":
+            g["errors"] += 1
+
+    error_classes = (
+        AICallLog.objects.filter(created_at__gte=since, status="error")
+        .values("error_class")
+        .annotate(count=Count("id"))
+        .order_by("-count")
+    )
+
+    return {
+        "since": since.isoformat(),
+        "groups": [
+            {
+                "endpoint": endpoint,
+                "model": model,
+                "calls": len(g["latencies"]),
+                "errors": g["errors"],
+                "error_rate": round(g["errors"] / len(g["latencies"]), 4),
+                "p50_ms": _percentile(g["latencies"], 50),
+                "p95_ms": _percentile(g["latencies"], 95),
+                "p99_ms": _percentile(g["latencies"], 99),
+                "avg_prompt_tokens": round(g["tokens"] / len(g["latencies"])),
+                "trimmed_calls": g["trimmed"],
+            }
+            for (endpoint, model), g in groups.items()
+        ],
+        "error_classes": list(error_classes),
+    }
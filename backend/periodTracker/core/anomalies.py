@@ -0,0 +1,187 @@
+# core/anomalies.py
+# Deterministic anomaly detection over cycle history:
+# - cycle / period length: rolling z-score against the previous WINDOW values
+# - symptom severity: spike vs the previous WINDOW logs, or severe (>= 9)
+#
+# Views call the on_*_changed hooks after writes; they only re-check the
+# newest entries (bounded reads). `manage.py detect_anomalies` rebuilds
+# everything from scratch.
+
+from datetime import timedelta
+
+from django.db import transaction
+
+from .models import CycleAnomaly, PeriodLog, SymptomLog
+
+WINDOW = 6
+MIN_HISTORY = 3
+Z_THRESHOLD = 2.0
+MIN_STD = 1.0                 # avoid flagging 1-day wobble on very regular cycles
+SEVERITY_SPIKE_MIN = 7        # a spike must also be at least this severe
+SEVERE = 9
+
+
+def _zscore(value, history):
+    """
+    Returns (mean, z) of value vs history, or (None, None) with too little data.
+    """
+    if len(history) < MIN_HISTORY:
+        return None, None
+    mean = sum(history) / len(history)
+    std = (sum((x - mean) ** 2 for x in history) / len(history)) ** 0.5
+    return mean, (value - mean) / max(std, MIN_STD)
+
+
+# ---------------------------
+# Detection (pure functions over ordered values)
+# ---------------------------
+
+def _length_flags(kind, points, label):
+    """
+    points: [(date, value)] oldest -> newest. Flags each point vs the WINDOW before it.
+    """
+    flags = []
+    for i, (d, value) in enumerate(points):
+        history = [v for _, v in points[max(0, i - WINDOW):i]]
+        mean, z = _zscore(value, history)
+        if z is not None and abs(z) >= Z_THRESHOLD:
+            direction = "longer" if z > 0 else "shorter"
+            flags.append(CycleAnomaly(
+                kind=kind, date=d, value=value, baseline=round(mean, 1), zscore=round(z, 2),
+                detail=f"{label} of {value} days is {direction} than your usual {round(mean, 1)} days",
+            ))
+    return flags
+
+
+def detect_severity(points):
+    flags = []
+    for i, (d, value) in enumerate(points):
+        history = [v for _, v in points[max(0, i - WINDOW):i]]
+        mean, z = _zscore(value, history)
+        spike = z is not None and z >= Z_THRESHOLD and value >= SEVERITY_SPIKE_MIN
+        if spike or value >= SEVERE:
+            detail = (
+                f"Symptom severity {value}/10 is well above your usual {round(mean, 1)}"
+                if spike else f"Severe symptoms logged ({value}/10)"
+            )
+            flags.append(CycleAnomaly(
+                kind="symptom_severity", date=d, value=value,
+                baseline=round(mean, 1) if mean is not None else None,
+                zscore=round(z, 2) if z is not None else None,
+                detail=detail,
+            ))
+    return flags
+
+
+def _period_points(logs):
+    """
+    logs: [(start_date, end_date)] oldest -> newest.
+    Returns (cycle_points, period_points), dated by the start that closes/owns them.
+    """
+    cycles, periods = [], []
+    for i, (start, end) in enumerate(logs):
+        if i > 0:
+            diff = (start - logs[i - 1][0]).days
+            if 0 < diff < 90:
+                cycles.append((start, diff))
+        if end and end >= start:
+            periods.append((start, (end - start).days + 1))
+    return cycles, periods
+
+
+def detect_period(logs):
+    cycles, periods = _period_points(logs)
+    return _length_flags("cycle_length", cycles, "Cycle length") + \
+        _length_flags("period_length", periods, "Period length")
+
+
+# ---------------------------
+# Persistence
+# ---------------------------
+
+def _replace(user, kinds, since, flags):
+    """
+    Replaces the user's flags of `kinds` dated >= since (None = all) with `flags`.
+    """
+    qs = CycleAnomaly.objects.filter(user=user, kind__in=kinds)
+    if since is not None:
+        qs = qs.filter(date__gte=since)
+        flags = [f for f in flags if f.date >= since]
+    with transaction.atomic():
+        qs.delete()
+        for f in flags:
+            f.user = user
+        CycleAnomaly.objects.bulk_create(flags)
+
+
+# Rows read by the incremental hooks. Points are only produced for some
+# rows (period length needs an end_date, cycle gaps of 90+ days are
+# skipped), so the cutoff is taken from the points, not the rows.
+_INCREMENTAL_ROWS = WINDOW * 2 + 2
+
+
+def _refresh(user, kind, points, complete, changed_date, detect):
+    """
+    Re-checks one kind from `points`, the newest points of the user (a suffix
+    of the full list; all of them if `complete`). Only points with WINDOW
+    points before them in the suffix are rewritten.
+    Returns False when the suffix is too short and a full rebuild is needed.
+    """
+    since = None
+    if not complete:
+        if len(points) <= WINDOW:
+            return False
+        # first date after the WINDOW oldest points (safe with equal dates)
+        since = points[WINDOW - 1][0] + timedelta(days=1)
+        if changed_date is not None and changed_date < since:
+            return False  # back-dated change: earlier windows shift too
+    _replace(user, [kind], since, detect(points))
+    return True
+
+
+def on_period_log_changed(user, changed_date=None):
+    """
+    Re-checks the newest cycles after a PeriodLog create/delete.
+    `changed_date`: start_date of the created/deleted log.
+    """
+    qs = PeriodLog.objects.for_user(user).order_by("-start_date", "-id")
+    starts = list(qs.values_list("start_date", "end_date")[:_INCREMENTAL_ROWS])[::-1]
+    ended = list(qs.filter(end_date__isnull=False).values_list("start_date", "end_date")[:_INCREMENTAL_ROWS])[::-1]
+    cycles, _ = _period_points(starts)
+    _, periods = _period_points(ended)
+
+    ok = _refresh(
+        user, "cycle_length", cycles, len(starts) < _INCREMENTAL_ROWS, changed_date,
+        lambda points: _length_flags("cycle_length", points, "Cycle length"),
+    ) and _refresh(
+        user, "period_length", periods, len(ended) < _INCREMENTAL_ROWS, changed_date,
+        lambda points: _length_flags("period_length", points, "Period length"),
+    )
+    if not ok:
+        rebuild_user(user)
+
+
+def on_symptom_log_changed(user, changed_date=None):
+    rows = list(
+        SymptomLog.objects.for_user(user)
+        .order_by("-date", "-id")
+        .values_list("date", "severity")[:_INCREMENTAL_ROWS]
+    )[::-1]
+    if not _refresh(user, "symptom_severity", rows, len(rows) < _INCREMENTAL_ROWS, changed_date, detect_severity):
+        rebuild_user(user)
+
+
+def rebuild_user(user):
+    logs = list(
+        PeriodLog.objects.for_user(user).order_by("start_date", "id").values_list("start_date", "end_date")
+    )
+    sym = list(SymptomLog.objects.for_user(user).order_by("date", "id").values_list("date", "severity"))
+    _replace(user, ["cycle_length", "period_length"], None, detect_period(logs))
+    _replace(user, ["symptom_severity"], None, detect_severity(sym))
+
+
+def recent_flags(user, days=120, today=None):
+    qs = CycleAnomaly.objects.filter(user=user)
+    if today is not None:
+        qs = qs.filter(date__gte=today - timedelta(days=days))
+    return list(qs.values("kind", "date", "value", "baseline", "zscore", "detail"))
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import hashers  # noqa: F401  registers the iteration check
+        from .tokens import connect_signals
+
+        connect_signals()
@@ -0,0 +1,147 @@
+# core/auth_guard.py
+# Caps how much CPU password hashing can take from the rest of the traffic.
+#
+# - run_hashing(fn, ...): login / registration password work runs on a small
+#   per-process thread pool (hashlib's PBKDF2 releases the GIL), so at most
+#   `workers` hashes run at once. The request thread still waits for its own
+#   hash; callers beyond `workers + max_pending` are refused at once with
+#   AuthBusy (-> 503) instead of adding more hashing load. `workers: 0` hashes
+#   inline in the request thread, uncapped (tests, single-threaded dev).
+# - throttle: per-IP attempt and per-username failure counters in the cache,
+#   fixed window. Use a shared cache (CACHES) to throttle across processes.
+#
+# Configured by settings.AUTH_PROTECTION.
+
+import threading
+from concurrent import futures
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+DEFAULTS = {
+    "workers": 2,
+    "max_pending": 16,
+    "timeout": 10,
+    "window": 300,
+    "ip_attempts": 30,
+    "username_failures": 5,
+}
+
+
+class AuthBusy(Exception):
+    """
+    Raised when the hashing pool is saturated or the work timed out.
+    """
+
+
+def _setting(name):
+    return getattr(settings, "AUTH_PROTECTION", {}).get(name, DEFAULTS[name])
+
+
+# ---------------------------
+# Bounded hashing pool
+# ---------------------------
+
+_pool = None
+_slots = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool():
+    global _pool, _slots
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = _setting("workers")
+                _slots = threading.BoundedSemaphore(workers + _setting("max_pending"))
+                _pool = futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix="auth-hash")
+    return _pool, _slots
+
+
+def _call(fn, args, kwargs):
+    # pool threads don't see request_started/finished; apply CONN_MAX_AGE here
+    close_old_connections()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def run_hashing(fn, *args, **kwargs):
+    """
+    Runs fn on the hashing pool, waits for it and returns its result.
+    Raises AuthBusy if the pool is full or the call exceeds the timeout; the
+    call may still complete afterwards, so fn should have no side effects a
+    retry can trip over (see register_user).
+    """
+    if _setting("workers") <= 0:
+        return fn(*args, **kwargs)
+    pool, slots = _get_pool()
+    if not slots.acquire(blocking=False):
+        raise AuthBusy("Too many concurrent sign-ins.")
+    try:
+        future = pool.submit(_call, fn, args, kwargs)
+    except BaseException:
+        slots.release()
+        raise
+    # the slot is held until the work finishes, even if the caller gave up
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=_setting("timeout"))
+    except futures.TimeoutError:
+        raise AuthBusy("Sign-in timed out.")
+
+
+def reset_pool():
+    global _pool, _slots
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+        _pool, _slots = None, None
+
+
+# ---------------------------
+# Attempt throttling
+# ---------------------------
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR") or "unknown"
+
+
+def _ip_key(ip):
+    return f"auth:ip:{ip}"
+
+
+def _user_key(username):
+    return f"auth:user:{username.lower()}"
+
+
+def _bump(key):
+    window = _setting("window")
+    cache.add(key, 0, timeout=window)
+    try:
+        return cache.incr(key)
+    except ValueError:  # expired between add and incr
+        cache.set(key, 1, timeout=window)
+        return 1
+
+
+def throttled(ip, username=None):
+    """
+    Counts this attempt against the IP. Returns seconds to wait when the IP
+    or the username is over its limit, else None.
+    """
+    if _bump(_ip_key(ip)) > _setting("ip_attempts"):
+        return _setting("window")
+    if username and cache.get(_user_key(username), 0) >= _setting("username_failures"):
+        return _setting("window")
+    return None
+
+
+def record_failure(username):
+    _bump(_user_key(username))
+
+
+def record_success(username):
+    cache.delete(_user_key(username))
@@ -0,0 +1,121 @@
+# core/chat_retention.py
+# Chat history retention: archive old messages into compressed ChatArchive
+# rows and delete in bounded chunks so no single statement holds a long lock.
+
+import json
+import zlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ChatMessage, ChatArchive
+
+
+def _retention_setting(name, default):
+    return getattr(settings, "CHAT_RETENTION", {}).get(name, default)
+
+
+def batch_size() -> int:
+    return _retention_setting("batch_size", 500)
+
+
+def delete_in_batches(queryset, size=None) -> int:
+    """
+    Deletes `queryset` in chunks of `size` rows, one short transaction each.
+    Returns the number of rows deleted.
+    """
+    size = size or batch_size()
+    model, db = queryset.model, queryset.db
+    total = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:size])
+        if not ids:
+            return total
+        with transaction.atomic(using=db):
+            deleted, _ = model.objects.using(db).filter(pk__in=ids).delete()
+        total += deleted
+
+
+def _pack(rows) -> bytes:
+    data = [
+        {"role": r, "content": c, "created_at": t.isoformat()}
+        for _, r, c, t in rows
+    ]
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"), 6)
+
+
+def unpack(archive: ChatArchive):
+    return json.loads(zlib.decompress(bytes(archive.payload)).decode("utf-8"))
+
+
+def archive_in_batches(user, queryset, size=None) -> int:
+    """
+    Moves messages from `queryset` (oldest first) into ChatArchive rows,
+    `size` messages per archive row and per transaction.
+    """
+    size = size or batch_size()
+    total = 0
+    while True:
+        rows = list(
+            queryset.order_by("created_at", "id")
+            .values_list("id", "role", "content", "created_at")[:size]
+        )
+        if not rows:
+            return total
+        # Messages may be on a shard DB: the archive commits first, so a
+        # failure in between can only duplicate messages, never lose them.
+        with transaction.atomic(using=queryset.db):
+            with transaction.atomic():
+                ChatArchive.objects.create(
+                    user=user,
+                    first_message_at=rows[0][3],
+                    last_message_at=rows[-1][3],
+                    message_count=len(rows),
+                    payload=_pack(rows),
+                )
+            ChatMessage.objects.using(queryset.db).filter(id__in=[r[0] for r in rows]).delete()
+        total += len(rows)
+
+
+def expired_messages(user, max_messages=None, max_days=None):
+    """
+    Queryset of the user's messages outside the retention policy:
+    older than `max_days`, or beyond the newest `max_messages`.
+    """
+    qs = ChatMessage.objects.for_user(user)
+    cutoff = None
+
+    if max_days:
+        cutoff = timezone.now() - timedelta(days=max_days)
+
+    if max_messages:
+        # created_at of the oldest message we keep
+        keep_from = (
+            qs.order_by("-created_at", "-id")
+            .values_list("created_at", flat=True)[max_messages - 1:max_messages]
+            .first()
+        )
+        if keep_from is not None:
+            cutoff = keep_from if cutoff is None else max(cutoff, keep_from)
+
+    if cutoff is None:
+        return qs.none()
+    return qs.filter(created_at__lt=cutoff)
+
+
+def compact_user(user, max_messages=None, max_days=None, archive=True, size=None) -> int:
+    expired = expired_messages(user, max_messages, max_days)
+    if archive:
+        return archive_in_batches(user, expired, size)
+    return delete_in_batches(expired, size)
+
+
+def clear_user(user, size=None) -> int:
+    """
+    Used by chat_clear: removes live messages and archives in bounded chunks.
+    """
+    n = delete_in_batches(ChatMessage.objects.for_user(user), size)
+    delete_in_batches(ChatArchive.objects.filter(user=user), size)
+    return n
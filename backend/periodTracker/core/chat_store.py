@@ -0,0 +1,121 @@
+# core/chat_store.py
+# Chat persistence for the chatbot view. Both turns of an exchange are
+# written together in one transaction (one bulk INSERT, one commit).
+#
+# settings.CHAT_PERSISTENCE["mode"]:
+#   "sync"     - commit before the reply is returned (durable)
+#   "buffered" - write-behind: turns are queued per process and flushed in
+#                groups (flush_size rows or every flush_interval seconds).
+#                Faster under load; a crash can lose up to one interval.
+
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from .models import ChatMessage
+from .sharding import shard_for
+
+logger = logging.getLogger(__name__)
+
+
+def _persistence_setting(name, default):
+    return getattr(settings, "CHAT_PERSISTENCE", {}).get(name, default)
+
+
+def _write(msgs):
+    """
+    One bulk INSERT + commit per shard touched.
+    """
+    by_shard = {}
+    for m in msgs:
+        by_shard.setdefault(shard_for(m.user_id), []).append(m)
+    for alias, group in by_shard.items():
+        with transaction.atomic(using=alias):
+            ChatMessage.objects.using(alias).bulk_create(group)
+
+
+def _turns(user, prompt, reply):
+    msgs = [ChatMessage(user=user, role="user", content=prompt)]
+    if reply is not None:
+        msgs.append(ChatMessage(user=user, role="assistant", content=reply))
+    return msgs
+
+
+class ChatWriteBuffer:
+    def __init__(self, flush_size=50, flush_interval=0.5):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, msgs):
+        with self._lock:
+            self._pending.extend(msgs)
+            full = len(self._pending) >= self.flush_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+        try:
+            _write(batch)
+        except Exception:
+            logger.exception("Chat write-behind flush failed (%d messages)", len(batch))
+            return 0
+        return len(batch)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()  # timer thread owns its own DB connections
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> ChatWriteBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ChatWriteBuffer(
+                    flush_size=_persistence_setting("flush_size", 50),
+                    flush_interval=_persistence_setting("flush_interval", 0.5),
+                )
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def flush_pending():
+    """
+    Called before reads/deletes of chat history so this process sees its own writes.
+    """
+    if _buffer is not None:
+        _buffer.flush()
+
+
+def save_exchange(user, prompt, reply=None):
+    """
+    Persists the user turn and (if any) the assistant reply together.
+    """
+    msgs = _turns(user, prompt, reply)
+    if _persistence_setting("mode", "sync") == "buffered":
+        get_buffer().add(msgs)
+        return
+    _write(msgs)
@@ -0,0 +1,97 @@
+# core/cycle.py
+# Cycle predictions shared by the dashboard / calendar endpoints.
+# Mirrors the math in frontend/js/dashboard.js so both sides agree.
+
+from datetime import timedelta
+
+DEFAULT_CYCLE_LENGTH = 28
+DEFAULT_PERIOD_LENGTH = 5
+
+# Predictions only look at the most recent logs, so their cost
+# does not grow with the user's history.
+PREDICTION_HISTORY = 12
+
+
+def _avg(nums):
+    if not nums:
+        return None
+    return round(sum(nums) / len(nums), 1)
+
+
+def average_cycle_length(starts, manual_lengths=()):
+    """
+    starts: period start dates, oldest -> newest.
+    manual_lengths: user-entered cycle_length values (None allowed).
+    Prefers manual values when there are at least 2, else start-date gaps.
+    """
+    manual = [n for n in manual_lengths if n and n > 0]
+    if len(manual) >= 2:
+        return _avg(manual), "manual"
+
+    computed = []
+    for i in range(len(starts) - 1):
+        diff = (starts[i + 1] - starts[i]).days
+        if 0 < diff < 60:
+            computed.append(diff)
+    return (_avg(computed) or DEFAULT_CYCLE_LENGTH), "computed"
+
+
+def average_period_length(spans):
+    """
+    spans: (start_date, end_date_or_None) pairs.
+    """
+    lengths = [(e - s).days + 1 for s, e in spans if s and e and e >= s]
+    return round(_avg(lengths) or DEFAULT_PERIOD_LENGTH)
+
+
+def phase_name(cycle_day: int) -> str:
+    if cycle_day <= 5:
+        return "Menstrual phase"
+    if cycle_day <= 13:
+        return "Follicular phase"
+    if cycle_day <= 16:
+        return "Ovulation window"
+    return "Luteal phase"
+
+
+def predict(starts, manual_lengths, today):
+    """
+    Returns a dict with cycle state + predictions, or None when there are no logs.
+    All dates are `datetime.date`.
+    """
+    if not starts:
+        return None
+
+    avg_cycle, source = average_cycle_length(starts, manual_lengths)
+    last_start = starts[-1]
+    cycle_len = round(avg_cycle)
+
+    cycle_day = (today - last_start).days + 1
+    next_period = last_start + timedelta(days=cycle_len)
+
+    # ovulation approx avg_cycle - 14, fertile window: ovulation -5 to +1
+    ovulation = last_start + timedelta(days=max(10, cycle_len - 14))
+    fertile_start = ovulation - timedelta(days=5)
+    fertile_end = ovulation + timedelta(days=1)
+
+    if fertile_start <= today <= fertile_end:
+        chance = "High"
+    elif today == fertile_start - timedelta(days=1) or today == fertile_end + timedelta(days=1):
+        chance = "Medium"
+    else:
+        chance = "Low"
+
+    return {
+        "last_start": last_start,
+        "cycle_day": cycle_day,
+        "phase": phase_name(cycle_day),
+        "avg_cycle": avg_cycle,
+        "cycle_source": source,
+        "next_period": next_period,
+        "days_until_next": (next_period - today).days,
+        "ovulation": ovulation,
+        "fertile_start": fertile_start,
+        "fertile_end": fertile_end,
+        "in_fertile_window": fertile_start <= today <= fertile_end,
+        "pregnancy_chance": chance,
+    }
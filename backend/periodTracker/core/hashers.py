@@ -0,0 +1,36 @@
+# core/hashers.py
+# PBKDF2 with a configurable work factor (settings.PASSWORD_HASH_ITERATIONS).
+#
+# Keeps Django's "pbkdf2_sha256" algorithm name, so existing hashes verify
+# unchanged. When the configured iteration count differs from the one stored
+# in a hash, check_password() rehashes and saves the password on the next
+# successful login (Django's must_update), both when raising and lowering it.
+# Values below MIN_ITERATIONS (e.g. a dropped zero) are raised to it and
+# reported by `manage.py check`.
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core import checks
+
+MIN_ITERATIONS = 100_000
+
+
+def _configured():
+    return getattr(settings, "PASSWORD_HASH_ITERATIONS", None)
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return max(_configured() or PBKDF2PasswordHasher.iterations, MIN_ITERATIONS)
+
+
+@checks.register(checks.Tags.security)
+def check_iterations(app_configs, **kwargs):
+    configured = _configured()
+    if configured and configured < MIN_ITERATIONS:
+        return [checks.Warning(
+            f"PASSWORD_HASH_ITERATIONS={configured} is below the minimum; using {MIN_ITERATIONS}.",
+            id="core.W001",
+        )]
+    return []
@@ -0,0 +1,170 @@
+# core/intents.py
+# Rule-based fast path for the chatbot: deterministic cycle questions
+# ("When is my next period?", "Am I in fertile window?") are answered from
+# the user's PeriodLog predictions in milliseconds, without calling the LLM.
+# Only whole, short questions match; anything else (including messages about
+# pregnancy, pain, bleeding or causes) returns None and goes to llm_text().
+
+import re
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from . import cycle
+from .models import PeriodLog
+
+# Only short, whole questions take the fast path; anything else goes to the LLM
+MAX_FAST_PATH_CHARS = 80
+
+# Messages touching on causes, pregnancy, pain or bleeding need the chatbot's
+# safety rules even when they mention a cycle keyword.
+_NEEDS_LLM = re.compile(
+    r"\b(can|could|pregnan\w*|miss(ed|ing)?|late|pain\w*|bleed\w*|stress\w*"
+    r"|why|how come|should i worry|normal|worr\w*|sick|hurt\w*)\b"
+)
+
+_PREFIX = r"(?:(?:hi|hey|hello|ok|okay|so|please) )*"
+_SUFFIX = r"(?: (?:today|now|please|again))*"
+
+INTENTS = [
+    ("next_period", [
+        r"(?:when(?:s| is| will| does)?|what day is) my (?:next )?period"
+        r"(?: (?:due|coming|start|starting|going to start|come|arrive))?",
+        r"(?:my )?next period(?: date)?",
+        r"when should i expect my (?:next )?period",
+    ]),
+    ("fertile_window", [
+        r"am i (?:in )?(?:my )?fertile(?: window)?",
+        r"(?:when|what) is my fertile window",
+        r"(?:my )?fertile window",
+        r"when am i (?:most )?fertile",
+    ]),
+    ("ovulation", [
+        r"when (?:do|will) i ovulate(?: next)?",
+        r"(?:what day|when) (?:is|will be) my (?:next )?ovulation(?: day)?",
+        r"(?:my )?(?:next )?ovulation (?:day|date)",
+        r"what day (?:do|will) i ovulate",
+    ]),
+    ("cycle_phase", [
+        r"what day of my cycle (?:is it|am i on|am i)",
+        r"what cycle day (?:is it|am i on|am i)",
+        r"(?:what|which) (?:cycle )?phase (?:am i in|of my cycle am i in|is it)",
+        r"(?:my )?cycle day",
+    ]),
+]
+_COMPILED = [
+    (name, re.compile(f"{_PREFIX}(?:{'|'.join(patterns)}){_SUFFIX}"))
+    for name, patterns in INTENTS
+]
+
+DISCLAIMER = "Estimates only — not contraception or medical advice."
+
+_METRIC_HITS = "chat_fast_path:hits"
+_METRIC_MISSES = "chat_fast_path:misses"
+
+
+def _normalize(prompt: str) -> str:
+    text = prompt.lower().replace("’", "'").replace("'", "")
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", text).split())
+
+
+def classify(prompt: str):
+    """
+    Intent name when the whole message is one of the known short questions, else None.
+    """
+    if len(prompt) > MAX_FAST_PATH_CHARS:
+        return None
+    text = _normalize(prompt)
+    if _NEEDS_LLM.search(text):
+        return None
+    for name, pattern in _COMPILED:
+        if pattern.fullmatch(text):
+            return name
+    return None
+
+
+def _predict(user, today):
+    recent = list(
+        PeriodLog.objects.for_user(user)
+        .order_by("-start_date")
+        .values_list("start_date", "cycle_length")[:cycle.PREDICTION_HISTORY]
+    )[::-1]
+    return cycle.predict([r[0] for r in recent], [r[1] for r in recent], today)
+
+
+def _fmt(d):
+    return d.strftime("%b %d, %Y").replace(" 0", " ")
+
+
+def _answer(intent, pred, today):
+    if pred is None:
+        return "I need at least one period log to estimate that. Add your last period start date and ask again."
+
+    if intent == "next_period":
+        days = pred["days_until_next"]
+        if days > 0:
+            when = f"in {days} day(s)"
+        elif days == 0:
+            when = "today"
+        else:
+            when = f"{-days} day(s) ago — if it has started, log it so predictions stay accurate"
+        return (
+            f"Your next period is estimated for {_fmt(pred['next_period'])} ({when}), "
+            f"based on an average cycle of {pred['avg_cycle']} days.\n{DISCLAIMER}"
+        )
+
+    if intent == "fertile_window":
+        window = f"{_fmt(pred['fertile_start'])} – {_fmt(pred['fertile_end'])}"
+        if pred["in_fertile_window"]:
+            left = (pred["fertile_end"] - today).days
+            status = "Yes, you are likely in your fertile window today" + (
+                " (last fertile day)." if left == 0 else f" (ends in {left} day(s))."
+            )
+        else:
+            status = "You are probably not in your fertile window today."
+        return f"{status}\nEstimated fertile window: {window}.\n{DISCLAIMER}"
+
+    if intent == "ovulation":
+        return f"Your estimated ovulation day is {_fmt(pred['ovulation'])}.\n{DISCLAIMER}"
+
+    # cycle_phase
+    return (
+        f"You are on cycle day {pred['cycle_day']} (~{round(pred['avg_cycle'])}-day cycle), "
+        f"in the {pred['phase'].lower()}.\n{DISCLAIMER}"
+    )
+
+
+def _count(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, 1, timeout=None)
+
+
+def fast_answer(user, prompt: str):
+    """
+    Returns (intent, reply) when the rules can answer, else None.
+    Counts hits/misses for fast_path_metrics().
+    """
+    intent = classify(prompt)
+    if intent is None:
+        _count(_METRIC_MISSES)
+        return None
+
+    today = timezone.localdate()
+    _count(_METRIC_HITS)
+    _count(f"{_METRIC_HITS}:{intent}")
+    return intent, _answer(intent, _predict(user, today), today)
+
+
+def fast_path_metrics() -> dict:
+    hits = cache.get(_METRIC_HITS, 0)
+    misses = cache.get(_METRIC_MISSES, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+        "by_intent": {name: cache.get(f"{_METRIC_HITS}:{name}", 0) for name, _ in INTENTS},
+    }
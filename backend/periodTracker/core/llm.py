@@ -0,0 +1,294 @@
+# core/llm.py
+# Pluggable LLM providers, selected by settings.LLM:
+#   gemini  -> Google Gemini (google-genai SDK, imported on first use only)
+#   local   -> deterministic template replies, no network (load tests, dev)
+#   record  -> calls the `record_inner` provider and appends replies to a JSONL file
+#   replay  -> answers from that JSONL file only
+# Per-endpoint model routing lives in settings.LLM["models"].
+# Prompts come from core/prompts.py as (system, user); providers that accept
+# a separate system instruction get it as a stable, cacheable prefix.
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .ai_log import record_ai_call
+from .prompts import count_tokens
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+
+class LLMError(Exception):
+    """
+    Raised by providers for configuration problems (missing key/SDK/recording).
+    """
+
+
+def join_prompt(system_text, user_text):
+    return f"{system_text}\n\nUSER:\n{user_text}"
+
+
+class LLMProvider:
+    name = "base"
+
+    def generate(self, prompt: str, model: str, endpoint: str = "") -> str:
+        raise NotImplementedError
+
+    def generate_parts(self, system_text: str, user_text: str, model: str, endpoint: str = "") -> str:
+        """
+        Providers with a separate system instruction override this.
+        """
+        return self.generate(join_prompt(system_text, user_text), model, endpoint)
+
+
+# ---------------------------
+# Gemini
+# ---------------------------
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self):
+        self._client = None
+        self._types = None  # google.genai.types, set with the client
+        self._prefix_caches = {}  # (model, sha256(system)) -> (cache name or None, expires)
+        self._cache_lock = threading.Lock()
+
+    def _get_client(self):
+        """
+        Reads GEMINI_API_KEY from environment variables.
+        """
+        if self._client is None:
+            api_key = os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise LLMError("GEMINI_API_KEY is not set on the server.")
+            try:
+                from google import genai  # lazy: heavy import, see module comment
+                from google.genai import types
+            except ImportError:
+                raise LLMError("google-genai is not installed on the server.")
+            self._types = types
+            self._client = genai.Client(api_key=api_key)
+        return self._client
+
+    def generate(self, prompt, model, endpoint=""):
+        resp = self._get_client().models.generate_content(model=model, contents=prompt)
+        return (getattr(resp, "text", "") or "").strip()
+
+    def generate_parts(self, system_text, user_text, model, endpoint=""):
+        client = self._get_client()
+        types = self._types
+        cached = self._cached_prefix(client, types, system_text, model, endpoint)
+        if cached:
+            config = types.GenerateContentConfig(cached_content=cached)
+        else:
+            # same system_instruction every call -> eligible for implicit prefix caching
+            config = types.GenerateContentConfig(system_instruction=system_text)
+        resp = client.models.generate_content(model=model, contents=user_text, config=config)
+        return (getattr(resp, "text", "") or "").strip()
+
+    def _cached_prefix(self, client, types, system_text, model, endpoint):
+        """
+        Name of an explicit context cache holding system_text, or None.
+        Only for prefixes of at least LLM["context_cache"]["min_tokens"]
+        (Gemini rejects smaller ones). Failures are remembered for one ttl.
+        """
+        conf = _llm_setting("context_cache", {})
+        if not conf.get("enabled") or count_tokens(system_text) < conf.get("min_tokens", 1024):
+            return None
+
+        ttl = conf.get("ttl_seconds", 3600)
+        key = (model, hashlib.sha256(system_text.encode("utf-8")).hexdigest())
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._prefix_caches.get(key)
+            if entry and entry[1] - now > 60:  # refresh a minute before expiry
+                return entry[0]
+            try:
+                created = client.caches.create(
+                    model=model,
+                    config=types.CreateCachedContentConfig(
+                        system_instruction=system_text,
+                        ttl=f"{ttl}s",
+                        display_name=f"periodtracker-{endpoint}",
+                    ),
+                )
+                name = created.name
+            except Exception:
+                logger.warning("Could not create Gemini context cache for %s", endpoint, exc_info=True)
+                name = None
+            self._prefix_caches[key] = (name, now + ttl)
+            return name
+
+
+# ---------------------------
+# Local deterministic backend
+# ---------------------------
+
+_LOCAL_TEMPLATES = {
+    "chatbot": (
+        "Thanks for your question. Based on your logs, keep tracking your cycle "
+        "and symptoms. If you have severe pain, heavy bleeding or fever, please see a clinician."
+    ),
+    "insights": (
+        "- Your cycle data is being tracked consistently.\n"
+        "- Keep logging start and end dates to improve predictions.\n"
+        "- Note symptoms and mood daily to spot patterns.\n"
+        "- Safety note: see a clinician if symptoms become severe."
+    ),
+    "mood_tip": (
+        "- Your feelings are valid.\n"
+        "- Try a short walk, some water and a few slow breaths.\n"
+        "- Rest if you can, and reach out to someone you trust."
+    ),
+    "symptom_tip": (
+        "- Stay hydrated.\n"
+        "- A heat pad and gentle stretching can ease cramps.\n"
+        "- Rest when you need to.\n"
+        "- Safety note: see a doctor for severe pain, heavy bleeding, fainting or fever."
+    ),
+}
+
+
+class LocalProvider(LLMProvider):
+    """
+    Same prompt -> same reply, instantly. Never raises.
+    """
+    name = "local"
+
+    def generate(self, prompt, model, endpoint=""):
+        text = _LOCAL_TEMPLATES.get(endpoint, _LOCAL_TEMPLATES["chatbot"])
+        tag = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        return f"{text}\n\n(local:{tag})"
+
+
+# ---------------------------
+# Record / replay
+# ---------------------------
+
+def _recording_key(prompt, model):
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class RecordingProvider(LLMProvider):
+    name = "record"
+
+    def __init__(self, inner: LLMProvider, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model, endpoint=""):
+        return self._record(prompt, model, endpoint, self.inner.generate(prompt, model, endpoint))
+
+    def generate_parts(self, system_text, user_text, model, endpoint=""):
+        text = self.inner.generate_parts(system_text, user_text, model, endpoint)
+        return self._record(join_prompt(system_text, user_text), model, endpoint, text)
+
+    def _record(self, prompt, model, endpoint, text):
+        line = json.dumps({"key": _recording_key(prompt, model), "endpoint": endpoint, "text": text})
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return text
+
+
+class ReplayProvider(LLMProvider):
+    name = "replay"
+
+    def __init__(self, path):
+        self.replies = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        row = json.loads(line)
+                        self.replies[row["key"]] = row["text"]
+        except FileNotFoundError:
+            raise LLMError(f"LLM recording not found: {path}")
+
+    def generate(self, prompt, model, endpoint=""):
+        try:
+            return self.replies[_recording_key(prompt, model)]
+        except KeyError:
+            raise LLMError("No recorded reply for this prompt.")
+
+
+# ---------------------------
+# Selection + routing
+# ---------------------------
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _llm_setting(name, default=None):
+    return getattr(settings, "LLM", {}).get(name, default)
+
+
+def _build_provider(name):
+    if name == "gemini":
+        return GeminiProvider()
+    if name == "local":
+        return LocalProvider()
+    if name == "record":
+        inner = _build_provider(_llm_setting("record_inner", "gemini"))
+        return RecordingProvider(inner, _llm_setting("record_path"))
+    if name == "replay":
+        return ReplayProvider(_llm_setting("record_path"))
+    raise LLMError(f"Unknown LLM provider: {name}")
+
+
+def get_provider() -> LLMProvider:
+    """
+    One provider per process, built on first use.
+    """
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = _build_provider(_llm_setting("provider", "gemini"))
+    return _provider
+
+
+def reset_provider():
+    global _provider
+    _provider = None
+
+
+def model_for(endpoint: str) -> str:
+    return _llm_setting("models", {}).get(endpoint) or _llm_setting("default_model", GEMINI_MODEL)
+
+
+def llm_text(system_text: str, user_text: str, endpoint: str = "", model: str = None, trimmed=()):
+    """
+    Returns (text, error_string_or_None)
+    Every call is recorded in AICallLog (see core/ai_log.py).
+    trimmed: context sections dropped to fit the budget (Prompt.dropped).
+    """
+    prompt_chars = len(system_text) + len(user_text)
+    prompt_tokens = count_tokens(system_text) + count_tokens(user_text)
+    model = model or model_for(endpoint)
+    t0 = time.perf_counter()
+    text, error = None, None
+
+    try:
+        provider = get_provider()
+        text = provider.generate_parts(system_text, user_text, model, endpoint)
+        log_model = f"{provider.name}:{model}"
+    except Exception as e:
+        error = e
+        log_model = f"{_llm_setting('provider', 'gemini')}:{model}"
+
+    latency = (time.perf_counter() - t0) * 1000
+    record_ai_call(endpoint, log_model, latency, prompt_chars, len(text or ""), error, prompt_tokens, trimmed)
+
+    if error:
+        return None, str(error)
+    return text, None
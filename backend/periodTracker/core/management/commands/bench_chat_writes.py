@@ -0,0 +1,54 @@
+# core/management/commands/bench_chat_writes.py
+# python manage.py bench_chat_writes --turns 500
+#
+# Chat inserts/second for:
+#   autocommit - two ChatMessage.objects.create() per turn (previous behaviour)
+#   sync       - both turns in one transaction (save_exchange, mode "sync")
+#   buffered   - write-behind buffer flushing every 50 rows
+# Uses a throwaway user that is deleted afterwards.
+
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.chat_retention import delete_in_batches
+from core.chat_store import ChatWriteBuffer, _turns, save_exchange
+from core.models import ChatMessage
+
+
+class Command(BaseCommand):
+    help = "Benchmark chat message persistence (inserts per second)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--turns", type=int, default=500)
+        parser.add_argument("--flush-size", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        turns = opts["turns"]
+        user, _ = User.objects.get_or_create(username="__bench_chat_writes__")
+
+        def autocommit():
+            for i in range(turns):
+                ChatMessage.objects.create(user=user, role="user", content=f"q{i}")
+                ChatMessage.objects.create(user=user, role="assistant", content=f"a{i}")
+
+        def sync():
+            for i in range(turns):
+                save_exchange(user, f"q{i}", f"a{i}")
+
+        def buffered():
+            buf = ChatWriteBuffer(flush_size=opts["flush_size"], flush_interval=60)
+            for i in range(turns):
+                buf.add(_turns(user, f"q{i}", f"a{i}"))
+            buf.flush()
+
+        try:
+            for name, fn in [("autocommit", autocommit), ("sync", sync), ("buffered", buffered)]:
+                t0 = time.perf_counter()
+                fn()
+                dt = time.perf_counter() - t0
+                self.stdout.write(f"{name:10} {2 * turns / dt:10.0f} inserts/s  ({dt * 1000:.0f} ms)")
+        finally:
+            delete_in_batches(ChatMessage.objects.for_user(user))
+            user.delete()
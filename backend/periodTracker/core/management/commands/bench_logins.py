@@ -0,0 +1,80 @@
+# core/management/commands/bench_logins.py
+# python manage.py bench_logins --seconds 2 --iterations 260000 600000 1000000
+#
+# Password verifications per second on one core for the configured hasher
+# (and optionally other PBKDF2 iteration counts), then end-to-end
+# authenticate() throughput through the bounded hashing pool
+# (core/auth_guard.py) with --clients concurrent callers.
+# Uses a throwaway user that is deleted afterwards.
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password, get_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core import auth_guard
+
+PASSWORD = "bench-password-123"
+
+
+def _rate(fn, seconds):
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn()
+        n += 1
+    return n / (time.perf_counter() - t0)
+
+
+class Command(BaseCommand):
+    help = "Benchmark password hashing cost (logins per second per core)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seconds", type=float, default=2.0)
+        parser.add_argument("--iterations", type=int, nargs="*", default=[],
+                            help="Extra PBKDF2 iteration counts to compare.")
+        parser.add_argument("--clients", type=int, default=8)
+        parser.add_argument("--logins", type=int, default=50)
+
+    def handle(self, *args, **opts):
+        seconds = opts["seconds"]
+        hasher = get_hasher()
+        encoded = make_password(PASSWORD)
+        rate = _rate(lambda: check_password(PASSWORD, encoded), seconds)
+        self.stdout.write(
+            f"{hasher.algorithm} ({getattr(hasher, 'iterations', '-')} iterations): "
+            f"{rate:8.1f} logins/s/core  {1000 / rate:6.1f} ms each"
+        )
+
+        pbkdf2 = PBKDF2PasswordHasher()
+        for n in opts["iterations"]:
+            enc = pbkdf2.encode(PASSWORD, pbkdf2.salt(), iterations=n)
+            rate = _rate(lambda: pbkdf2.verify(PASSWORD, enc), seconds)
+            self.stdout.write(f"pbkdf2_sha256 ({n} iterations): {rate:8.1f} logins/s/core  {1000 / rate:6.1f} ms each")
+
+        user = User.objects.create_user(username="__bench_logins__", password=PASSWORD)
+        try:
+            ok = busy = 0
+
+            def login(_):
+                try:
+                    return auth_guard.run_hashing(authenticate, username=user.username, password=PASSWORD)
+                except auth_guard.AuthBusy:
+                    return None
+
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=opts["clients"]) as callers:
+                for result in callers.map(login, range(opts["logins"])):
+                    if result is None:
+                        busy += 1
+                    else:
+                        ok += 1
+            dt = time.perf_counter() - t0
+            self.stdout.write(
+                f"pool (workers={auth_guard._setting('workers')}, clients={opts['clients']}): "
+                f"{ok / dt:8.1f} logins/s  ok={ok} busy={busy}"
+            )
+        finally:
+            user.delete()
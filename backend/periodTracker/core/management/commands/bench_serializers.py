@@ -0,0 +1,96 @@
+# core/management/commands/bench_serializers.py
+# python manage.py bench_serializers --rows 2000 --repeat 20
+#
+# Compares ModelSerializer(many=True) against the values()-based fast path
+# (rows + columns) and json vs orjson rendering. Test data is created inside
+# transactions (default + the user's shard) that are rolled back.
+
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.models import PeriodLog, MoodLog, SymptomLog
+from core.renderers import ORJSONRenderer
+from core.sharding import shard_for
+from core.serializers import (
+    PeriodLogSerializer,
+    MoodLogSerializer,
+    SymptomLogSerializer,
+    PERIOD_LOG_FIELDS,
+    MOOD_LOG_FIELDS,
+    SYMPTOM_LOG_FIELDS,
+    fast_rows,
+    fast_columns,
+)
+
+
+def _best(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        dt = time.perf_counter() - t0
+        best = dt if best is None or dt < best else best
+    return best * 1000
+
+
+class Command(BaseCommand):
+    help = "Benchmark list serialization: DRF ModelSerializer vs values() fast path."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **opts):
+        rows, repeat = opts["rows"], opts["repeat"]
+
+        with transaction.atomic():
+            user = User.objects.create_user(username="__bench_serializers__", password="x")
+            shard = shard_for(user.id)
+            with transaction.atomic(using=shard):
+                start = date(2000, 1, 1)
+                PeriodLog.objects.on_shard_of(user).bulk_create([
+                    PeriodLog(user=user, start_date=start + timedelta(days=28 * i),
+                              end_date=start + timedelta(days=28 * i + 4),
+                              flow_level="medium", mood="calm", symptoms="cramps")
+                    for i in range(rows)
+                ])
+                MoodLog.objects.on_shard_of(user).bulk_create([
+                    MoodLog(user=user, date=start + timedelta(days=i), mood="happy", intensity=i % 10 + 1)
+                    for i in range(rows)
+                ])
+                SymptomLog.objects.on_shard_of(user).bulk_create([
+                    SymptomLog(user=user, date=start + timedelta(days=i), symptoms=["cramps", "fatigue"],
+                               severity=i % 10 + 1)
+                    for i in range(rows)
+                ])
+
+                cases = [
+                    ("period", PeriodLog, PeriodLogSerializer, PERIOD_LOG_FIELDS, "-start_date"),
+                    ("mood", MoodLog, MoodLogSerializer, MOOD_LOG_FIELDS, "-date"),
+                    ("symptom", SymptomLog, SymptomLogSerializer, SYMPTOM_LOG_FIELDS, "-date"),
+                ]
+
+                json_r, orjson_r = JSONRenderer(), ORJSONRenderer()
+                self.stdout.write(f"rows={rows} repeat={repeat} (best of, ms)")
+
+                for name, model, ser_cls, fields, order in cases:
+                    qs = lambda: model.objects.for_user(user).order_by(order)
+
+                    drf = _best(lambda: json_r.render(ser_cls(qs(), many=True).data), repeat)
+                    fast = _best(lambda: json_r.render(fast_rows(qs(), fields)), repeat)
+                    fast_or = _best(lambda: orjson_r.render(fast_rows(qs(), fields)), repeat)
+                    cols_or = _best(lambda: orjson_r.render(fast_columns(qs(), fields)), repeat)
+
+                    self.stdout.write(
+                        f"{name:8} drf={drf:8.2f}  fast+json={fast:8.2f}  "
+                        f"fast+orjson={fast_or:8.2f}  columns+orjson={cols_or:8.2f}  "
+                        f"speedup={drf / fast_or:5.1f}x"
+                    )
+
+                transaction.set_rollback(True, using=shard)
+            transaction.set_rollback(True)
@@ -0,0 +1,62 @@
+# core/management/commands/bench_startup.py
+# python manage.py bench_startup [--top 15]
+#
+# Import-time profile of a cold worker: runs `python -X importtime` in a
+# fresh interpreter that sets up Django and imports the URLconf (and so
+# core.views), then reports total import time, the slowest modules, and
+# fails if any module that should be lazy was imported.
+
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that must only be imported on first use
+LAZY_MODULES = ("google.genai", "numpy")
+
+_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+_BOOT = (
+    "import django; django.setup(); "
+    "from django.urls import get_resolver; get_resolver().url_patterns"
+)
+
+
+class Command(BaseCommand):
+    help = "Profile cold-start imports (python -X importtime) and check lazy modules."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15)
+
+    def handle(self, *args, **opts):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "periodTracker.settings")}
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _BOOT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise CommandError(proc.stderr.strip().splitlines()[-1] if proc.stderr else "boot failed")
+
+        # (cumulative_us, module) for top-level imports only
+        top_level, seen = [], set()
+        for line in proc.stderr.splitlines():
+            m = _LINE.match(line)
+            if not m:
+                continue
+            self_us, cum_us, indent, name = int(m[1]), int(m[2]), m[3], m[4]
+            seen.add(name)
+            if len(indent) == 1:
+                top_level.append((cum_us, name))
+
+        total_ms = sum(us for us, _ in top_level) / 1000
+        self.stdout.write(f"Total import time: {total_ms:.1f} ms ({len(seen)} modules)")
+        for us, name in sorted(top_level, reverse=True)[:opts["top"]]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {name}")
+
+        eager = [m for m in LAZY_MODULES if any(n == m or n.startswith(m + ".") for n in seen)]
+        if eager:
+            raise CommandError(f"Imported at startup but should be lazy: {', '.join(eager)}")
+        self.stdout.write(self.style.SUCCESS("Lazy modules not imported at startup."))
@@ -0,0 +1,49 @@
+# core/management/commands/compact_chat.py
+# Background job (cron / scheduler): python manage.py compact_chat
+#
+# Enforces CHAT_RETENTION per user. Expired messages are archived into
+# compressed ChatArchive rows (or deleted with --no-archive) in bounded batches.
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.chat_retention import compact_user
+from core.models import ChatMessage
+from core.sharding import users_with_rows
+
+
+class Command(BaseCommand):
+    help = "Archive/delete chat messages outside the retention policy, in batches."
+
+    def add_arguments(self, parser):
+        policy = getattr(settings, "CHAT_RETENTION", {})
+        parser.add_argument("--max-messages", type=int, default=policy.get("max_messages"))
+        parser.add_argument("--max-days", type=int, default=policy.get("max_days"))
+        parser.add_argument("--batch", type=int, default=policy.get("batch_size", 500))
+        parser.add_argument("--no-archive", action="store_true", help="Delete instead of archiving.")
+        parser.add_argument("--user", help="Only compact this username.")
+
+    def handle(self, *args, **opts):
+        if not opts["max_messages"] and not opts["max_days"]:
+            self.stdout.write("No retention policy set (CHAT_RETENTION / --max-messages / --max-days).")
+            return
+
+        users = User.objects.filter(id__in=users_with_rows(ChatMessage))
+        if opts["user"]:
+            users = users.filter(username=opts["user"])
+
+        total = 0
+        for user in users.only("id").iterator():
+            n = compact_user(
+                user,
+                max_messages=opts["max_messages"],
+                max_days=opts["max_days"],
+                archive=not opts["no_archive"],
+                size=opts["batch"],
+            )
+            if n:
+                self.stdout.write(f"user {user.id}: {n} messages compacted")
+            total += n
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {total} messages compacted."))
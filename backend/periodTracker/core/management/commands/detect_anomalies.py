@@ -0,0 +1,32 @@
+# core/management/commands/detect_anomalies.py
+# Full rebuild of CycleAnomaly flags (after changing thresholds, or to backfill):
+#   python manage.py detect_anomalies [--user USERNAME]
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.anomalies import rebuild_user
+from core.models import CycleAnomaly, PeriodLog, SymptomLog
+from core.sharding import users_with_rows
+
+
+class Command(BaseCommand):
+    help = "Recompute anomaly flags from the full PeriodLog / SymptomLog history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild this username.")
+
+    def handle(self, *args, **opts):
+        ids = set(users_with_rows(PeriodLog)) | set(users_with_rows(SymptomLog))
+        users = User.objects.filter(id__in=ids)
+        if opts["user"]:
+            users = users.filter(username=opts["user"])
+
+        n = 0
+        for user in users.only("id").iterator():
+            rebuild_user(user)
+            n += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt flags for {n} users ({CycleAnomaly.objects.count()} flags total)."
+        ))
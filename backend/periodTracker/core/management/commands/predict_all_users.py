@@ -0,0 +1,79 @@
+# core/management/commands/predict_all_users.py
+# Batch inference for every user with period logs:
+#   python manage.py predict_all_users
+# Features for all users are stacked into one matrix and scored at once;
+# results are upserted into UserPrediction, which the dashboard serves
+# while fresh.
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import ml
+from core.models import UserPrediction
+
+
+class Command(BaseCommand):
+    help = "Score all users with the local ML model and store UserPrediction rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        import numpy as np
+
+        model = ml.get_model()
+        if model is None:
+            raise CommandError("No trained model found. Run `manage.py train_cycle_model` first.")
+
+        starts_by_user = ml._user_starts()
+        # shard rows of deleted users are not cascaded (core/sharding.py)
+        existing = set(User.objects.values_list("id", flat=True))
+        user_ids = [u for u in starts_by_user if u in existing]
+        if not user_ids:
+            self.stdout.write("No period logs.")
+            return
+
+        today = timezone.localdate()
+        last_starts = [starts_by_user[u][-1] for u in user_ids]
+
+        X = np.array([ml.features(ml.cycle_lengths(starts_by_user[u])) for u in user_ids])
+        lengths = np.clip(X @ np.asarray(model.weights), ml.MIN_CYCLE, ml.MAX_CYCLE).round(1)
+
+        days = np.array([(today - s).days + 1 for s in last_starts])
+        rows = np.clip(days, 1, ml.MAX_CYCLE_DAY) - 1
+        in_table = (days >= 1) & (days <= ml.MAX_CYCLE_DAY)
+        sym_ok = in_table & (np.asarray(model.symptom_day_samples)[rows] >= ml.MIN_DAY_SAMPLES)
+        mood_ok = in_table & (np.asarray(model.mood_day_samples)[rows] >= ml.MIN_DAY_SAMPLES)
+        sym_probs = model.symptom_probs[rows]
+        top_symptoms = np.argsort(-sym_probs, axis=1)[:, :3]
+        mood_probs = model.mood_probs[rows]
+        top_mood = np.argmax(mood_probs, axis=1)
+
+        objs = [
+            UserPrediction(
+                user_id=user_id,
+                cycle_length=float(lengths[i]),
+                next_period=last_starts[i] + timedelta(days=int(round(lengths[i]))),
+                last_start=last_starts[i],
+                likely_symptoms=[
+                    {"symptom": model.symptoms[j], "probability": round(float(sym_probs[i, j]), 3)}
+                    for j in top_symptoms[i]
+                ] if sym_ok[i] else [],
+                likely_mood=model.moods[top_mood[i]] if mood_ok[i] else "",
+                mood_probability=round(float(mood_probs[i, top_mood[i]]), 3) if mood_ok[i] else None,
+                model_version=ml.MODEL_VERSION,
+            )
+            for i, user_id in enumerate(user_ids)
+        ]
+        UserPrediction.objects.bulk_create(
+            objs,
+            batch_size=opts["batch"],
+            update_conflicts=True,
+            unique_fields=["user"],
+            update_fields=["cycle_length", "next_period", "last_start", "likely_symptoms", "likely_mood",
+                           "mood_probability", "model_version", "updated_at"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Scored {len(objs)} users."))
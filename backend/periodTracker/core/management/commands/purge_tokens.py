@@ -0,0 +1,33 @@
+# core/management/commands/purge_tokens.py
+# Periodic job: python manage.py purge_tokens
+# Sign a user out everywhere: python manage.py purge_tokens --user USERNAME
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.chat_retention import delete_in_batches
+from core.models import AuthToken
+from core.tokens import flush_pending, revoke_user
+
+
+class Command(BaseCommand):
+    help = "Delete expired API tokens in batches, or revoke all tokens of one user."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Revoke every token of this username.")
+        parser.add_argument("--batch", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        if opts["user"]:
+            try:
+                user = User.objects.get(username=opts["user"])
+            except User.DoesNotExist:
+                raise CommandError("Unknown user.")
+            revoke_user(user)
+            self.stdout.write(self.style.SUCCESS(f"Revoked all tokens of {user.username}."))
+            return
+
+        flush_pending()  # don't purge tokens whose extension is still buffered here
+        n = delete_in_batches(AuthToken.objects.filter(expires_at__lte=timezone.now()), opts["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {n} expired tokens."))
@@ -0,0 +1,156 @@
+# core/management/commands/rebalance_shards.py
+# Move users' log rows between shard databases (core/sharding.py).
+#
+#   python manage.py rebalance_shards --status
+#   python manage.py rebalance_shards --user alice --to shard_2
+#   python manage.py rebalance_shards --auto [--dry-run]   # even out rows per shard
+#   python manage.py rebalance_shards --purge-orphans      # rows of deleted users
+#
+# Each user is moved as: copy rows to the target shard, switch the
+# ShardAssignment, delete the user's rows from every other shard in
+# batches. Row ids are reassigned on the target shard; created_at is kept.
+# A move is not atomic across databases, but it is idempotent: if it is
+# interrupted, run the same command again. Before the switch, a re-run
+# drops the partial copy and copies again; after it, a re-run only finishes
+# the cleanup. Shard placement is cached per process, so run moves with
+# workers stopped unless CACHES points at a shared cache.
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count
+
+from core.chat_retention import delete_in_batches
+from core.models import PeriodLog, MoodLog, SymptomLog, ChatMessage
+from core.sharding import all_shards, fan_out, set_shard, shard_for
+
+MODELS = [PeriodLog, MoodLog, SymptomLog, ChatMessage]
+
+
+def _rows_per_user(alias):
+    counts = {}
+    for model in MODELS:
+        rows = model.objects.using(alias).order_by().values_list("user_id").annotate(n=Count("id"))
+        for uid, n in rows:
+            counts[uid] = counts.get(uid, 0) + n
+    return counts
+
+
+def _copy_rows(model, user_id, source, target):
+    fields = [f.attname for f in model._meta.concrete_fields if not f.primary_key]
+    stamps = [f.attname for f in model._meta.concrete_fields if getattr(f, "auto_now_add", False)]
+    rows = list(model.objects.using(source).filter(user_id=user_id).values(*fields))
+    if not rows:
+        return 0
+    objs = [model(**r) for r in rows]
+    with transaction.atomic(using=target):
+        # bulk_create sets auto_now_add fields to now(); write the originals
+        # back by pk (needs a backend that returns ids: SQLite 3.35+, PostgreSQL)
+        model.objects.using(target).bulk_create(objs, batch_size=500)
+        if stamps:
+            for obj, row in zip(objs, rows):
+                for name in stamps:
+                    setattr(obj, name, row[name])
+            model.objects.using(target).bulk_update(objs, stamps, batch_size=500)
+    return len(rows)
+
+
+def move_user(user_id, target):
+    """
+    Moves all of a user's rows to `target`. Safe to re-run after an
+    interruption. Returns the number of rows copied.
+    """
+    copied = 0
+    source = shard_for(user_id)
+    if source != target:
+        for model in MODELS:
+            # leftovers of an interrupted copy (or an older move away from target)
+            delete_in_batches(model.objects.using(target).filter(user_id=user_id))
+            copied += _copy_rows(model, user_id, source, target)
+        set_shard(user_id, target)
+
+    for alias in all_shards():
+        if alias != target:
+            for model in MODELS:
+                delete_in_batches(model.objects.using(alias).filter(user_id=user_id))
+    return copied
+
+
+class Command(BaseCommand):
+    help = "Show shard load, move users between shards, or purge orphaned rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--status", action="store_true")
+        parser.add_argument("--user", help="Username to move (with --to).")
+        parser.add_argument("--to", help="Target shard alias.")
+        parser.add_argument("--auto", action="store_true", help="Move users off the fullest shards.")
+        parser.add_argument("--tolerance", type=float, default=0.1,
+                            help="--auto stops when every shard is within this fraction of the mean.")
+        parser.add_argument("--purge-orphans", action="store_true")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        shards = all_shards()
+
+        if opts["user"]:
+            if opts["to"] not in shards:
+                raise CommandError(f"--to must be one of: {', '.join(shards)}")
+            try:
+                user = User.objects.get(username=opts["user"])
+            except User.DoesNotExist:
+                raise CommandError("Unknown user.")
+            source = shard_for(user.id)
+            if source == opts["to"] and opts["dry_run"]:
+                self.stdout.write("User is already on that shard.")
+                return
+            # also re-run for a user already on --to: finishes an interrupted cleanup
+            n = 0 if opts["dry_run"] else move_user(user.id, opts["to"])
+            self.stdout.write(self.style.SUCCESS(f"{user.username}: {source} -> {opts['to']} ({n} rows)"))
+            return
+
+        # Per-shard row counts per user, gathered in parallel
+        per_shard = dict(zip(shards, fan_out(_rows_per_user, shards)))
+
+        if opts["purge_orphans"]:
+            existing = set(User.objects.values_list("id", flat=True))
+            for alias, counts in per_shard.items():
+                orphans = [uid for uid in counts if uid not in existing]
+                for model in MODELS:
+                    if orphans and not opts["dry_run"]:
+                        delete_in_batches(model.objects.using(alias).filter(user_id__in=orphans))
+                self.stdout.write(f"{alias}: {len(orphans)} orphaned users")
+            return
+
+        if opts["auto"]:
+            self._auto(per_shard, opts["tolerance"], opts["dry_run"])
+            return
+
+        for alias, counts in per_shard.items():
+            self.stdout.write(f"{alias:12} users={len(counts):6}  rows={sum(counts.values()):8}")
+
+    def _auto(self, per_shard, tolerance, dry_run):
+        load = {alias: sum(c.values()) for alias, c in per_shard.items()}
+        mean = sum(load.values()) / len(load)
+        moves = 0
+
+        while True:
+            src = max(load, key=load.get)
+            dst = min(load, key=load.get)
+            if load[src] <= mean * (1 + tolerance) or src == dst:
+                break
+            # biggest user that doesn't overshoot the target
+            gap = load[src] - mean
+            candidates = sorted(per_shard[src].items(), key=lambda kv: kv[1], reverse=True)
+            pick = next(((uid, n) for uid, n in candidates if n <= gap and load[dst] + n <= mean * (1 + tolerance)), None)
+            if pick is None:
+                break
+            uid, n = pick
+            if not dry_run:
+                move_user(uid, dst)
+            self.stdout.write(f"user {uid}: {src} -> {dst} ({n} rows)")
+            per_shard[dst][uid] = per_shard[src].pop(uid)
+            load[src] -= n
+            load[dst] += n
+            moves += 1
+
+        self.stdout.write(self.style.SUCCESS(f"{moves} users {'would be ' if dry_run else ''}moved."))
@@ -0,0 +1,32 @@
+# core/management/commands/rebuild_mood_trends.py
+# Full rebuild of MoodTrend aggregates (backfill, or after changing buckets):
+#   python manage.py rebuild_mood_trends [--user USERNAME]
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.models import MoodLog, MoodTrend
+from core.mood_trends import rebuild_user
+from core.sharding import users_with_rows
+
+
+class Command(BaseCommand):
+    help = "Recompute mood trend aggregates from the full MoodLog history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", help="Only rebuild this username.")
+
+    def handle(self, *args, **opts):
+        ids = set(users_with_rows(MoodLog)) | set(MoodTrend.objects.values_list("user_id", flat=True))
+        users = User.objects.filter(id__in=ids)
+        if opts["user"]:
+            users = users.filter(username=opts["user"])
+
+        n = 0
+        for user in users.only("id").iterator():
+            rebuild_user(user)
+            n += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt mood trends for {n} users ({MoodTrend.objects.count()} buckets total)."
+        ))
@@ -0,0 +1,24 @@
+# core/management/commands/rotate_ai_logs.py
+# Periodic job: python manage.py rotate_ai_logs --keep-days 30
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.chat_retention import delete_in_batches
+from core.models import AICallLog
+
+
+class Command(BaseCommand):
+    help = "Delete AICallLog rows older than --keep-days, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-days", type=int, default=getattr(settings, "AI_CALL_LOG_KEEP_DAYS", 30))
+        parser.add_argument("--batch", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days=opts["keep_days"])
+        n = delete_in_batches(AICallLog.objects.filter(created_at__lt=cutoff), opts["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {n} AI call log rows older than {cutoff:%Y-%m-%d}."))
@@ -0,0 +1,28 @@
+# core/management/commands/train_cycle_model.py
+# Offline training: python manage.py train_cycle_model [--out DIR]
+
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core import ml
+
+
+class Command(BaseCommand):
+    help = "Train the cycle-length / symptom / mood model from all logs and save the artifact."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", help="Artifact directory (default: settings.ML_MODEL_DIR).")
+
+    def handle(self, *args, **opts):
+        arrays, meta = ml.train()
+        out = Path(opts["out"]) if opts["out"] else None
+        ml.save(arrays, meta, out)
+        ml.reset_model()
+
+        mae = f"{meta['cycle_mae']:.2f} days" if meta["cycle_mae"] is not None else "n/a (fallback to mean)"
+        self.stdout.write(
+            f"cycle samples={meta['cycle_samples']} train MAE={mae}; "
+            f"symptom samples={meta['symptom_samples']}; mood samples={meta['mood_samples']}"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Saved model to {out or ml._model_dir()}"))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_symptomlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='periodlog',
+            index=models.Index(fields=['user', 'start_date'], name='core_period_user_id_86c9bc_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_periodlog_user_start_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_message_at', models.DateTimeField()),
+                ('last_message_at', models.DateTimeField()),
+                ('message_count', models.IntegerField()),
+                ('payload', models.BinaryField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['first_message_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['user', 'created_at'], name='core_chatme_user_id_0dd649_idx'),
+        ),
+        migrations.AddField(
+            model_name='chatarchive',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_archives', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
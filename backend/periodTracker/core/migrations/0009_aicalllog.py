@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_chat_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AICallLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50)),
+                ('model', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('ok', 'OK'), ('error', 'Error')], max_length=10)),
+                ('error_class', models.CharField(blank=True, default='', max_length=100)),
+                ('error_message', models.CharField(blank=True, default='', max_length=500)),
+                ('latency_ms', models.IntegerField()),
+                ('prompt_chars', models.IntegerField(default=0)),
+                ('response_chars', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
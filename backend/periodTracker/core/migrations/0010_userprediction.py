@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_aicalllog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cycle_length', models.FloatField()),
+                ('next_period', models.DateField()),
+                ('likely_symptoms', models.JSONField(default=list)),
+                ('likely_mood', models.CharField(blank=True, default='', max_length=20)),
+                ('model_version', models.IntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='prediction', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_userprediction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CycleAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('cycle_length', 'Cycle length'), ('period_length', 'Period length'), ('symptom_severity', 'Symptom severity')], max_length=20)),
+                ('date', models.DateField()),
+                ('value', models.FloatField()),
+                ('baseline', models.FloatField(blank=True, null=True)),
+                ('zscore', models.FloatField(blank=True, null=True)),
+                ('detail', models.CharField(max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='anomalies', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'unique_together': {('user', 'kind', 'date')},
+            },
+        ),
+    ]
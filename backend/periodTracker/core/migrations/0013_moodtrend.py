@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_user_shards'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoodTrend',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('phase', 'Cycle phase')], max_length=10)),
+                ('bucket', models.CharField(max_length=20)),
+                ('n', models.IntegerField(default=0)),
+                ('intensity_sum', models.IntegerField(default=0)),
+                ('counts', models.JSONField(default=dict)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mood_trends', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'granularity', 'bucket')},
+            },
+        ),
+    ]
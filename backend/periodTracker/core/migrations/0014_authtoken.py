@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:35
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    # Existing DRF tokens keep working; they now expire like new ones.
+    Token = apps.get_model("authtoken", "Token")
+    AuthToken = apps.get_model("core", "AuthToken")
+    now = timezone.now()
+    AuthToken.objects.bulk_create([
+        AuthToken(key=t.key, user_id=t.user_id, created_at=now, last_used=now,
+                  expires_at=now + timedelta(days=30))
+        for t in Token.objects.all()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_moodtrend'),
+        ('authtoken', '0003_tokenproxy'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('last_used', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicalllog',
+            name='prompt_tokens',
+            field=models.IntegerField(default=0),
+        ),
+    ]
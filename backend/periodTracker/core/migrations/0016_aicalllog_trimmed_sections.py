@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_aicalllog_prompt_tokens'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aicalllog',
+            name='trimmed_sections',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
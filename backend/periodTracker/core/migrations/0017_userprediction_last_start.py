@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_aicalllog_trimmed_sections'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprediction',
+            name='last_start',
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name='userprediction',
+            name='mood_probability',
+            field=models.FloatField(null=True),
+        ),
+    ]
@@ -0,0 +1,331 @@
+# core/ml.py
+# Small CPU-only models for "AI Cycle Length Prediction" and
+# "AI Symptom / Mood Prediction" (docs/features_list.txt).
+#
+# - cycle length: ridge regression on [last 3 cycle lengths, mean, std]
+# - symptoms / mood: smoothed probability tables indexed by cycle day
+#
+# Trained offline by `manage.py train_cycle_model` into settings.ML_MODEL_DIR
+# (plain .npy files + meta.json). Workers memory-map the artifact once and
+# serve single-user predictions in plain Python (microseconds).
+# NumPy is only imported when training or loading, not at startup.
+
+import json
+import threading
+from datetime import date
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cycle
+from .models import PeriodLog, SymptomLog, MoodLog
+from .sharding import fan_out
+
+MODEL_VERSION = 2
+HISTORY = 3              # previous cycle lengths used as features
+MAX_CYCLE_DAY = 45       # symptom / mood tables cover cycle days 1..45
+MIN_CYCLE, MAX_CYCLE = 15, 60
+RIDGE_LAMBDA = 1.0
+SMOOTHING = 1.0
+MIN_DAY_SAMPLES = 10   # below this a cycle day's table row is just the smoothed prior
+
+SYMPTOMS = [key for key, _ in SymptomLog.SYMPTOM_CHOICES]
+MOODS = [key for key, _ in MoodLog.MOOD_CHOICES]
+
+
+def _model_dir():
+    return getattr(settings, "ML_MODEL_DIR", settings.BASE_DIR / "ml_model")
+
+
+# ---------------------------
+# Features
+# ---------------------------
+
+def cycle_lengths(starts):
+    """
+    starts: period start dates, oldest -> newest.
+    """
+    out = []
+    for i in range(len(starts) - 1):
+        diff = (starts[i + 1] - starts[i]).days
+        if MIN_CYCLE <= diff <= MAX_CYCLE:
+            out.append(diff)
+    return out
+
+
+def features(lengths):
+    """
+    [1, last, last-1, last-2, mean, std] with missing history filled by the mean.
+    """
+    if not lengths:
+        mean, std = float(cycle.DEFAULT_CYCLE_LENGTH), 0.0
+    else:
+        mean = sum(lengths) / len(lengths)
+        std = (sum((x - mean) ** 2 for x in lengths) / len(lengths)) ** 0.5
+    recent = list(reversed(lengths[-HISTORY:]))
+    recent += [mean] * (HISTORY - len(recent))
+    return [1.0, *map(float, recent), mean, std]
+
+
+# ---------------------------
+# Training
+# ---------------------------
+
+def _user_starts():
+    """
+    {user_id: [start_date, ...]} oldest -> newest, one query per shard (in parallel).
+    """
+    parts = fan_out(lambda alias: list(
+        PeriodLog.objects.using(alias)
+        .order_by("user_id", "start_date")
+        .values_list("user_id", "start_date")
+    ))
+    starts = {}
+    for rows in parts:  # users never span shards
+        for user_id, start in rows:
+            starts.setdefault(user_id, []).append(start)
+    return starts
+
+
+def _all_rows(model, *fields):
+    parts = fan_out(lambda alias: list(model.objects.using(alias).order_by().values_list(*fields)))
+    return [row for rows in parts for row in rows]
+
+
+def _cycle_day_table(np, starts_by_user, rows, n_classes, encode):
+    """
+    Counts (cycle_day, class) occurrences for rows of (user_id, date, value).
+    Cycle day is relative to the latest period start on or before the date.
+    """
+    counts = np.zeros((MAX_CYCLE_DAY, n_classes), dtype=np.float64)
+    totals = np.zeros(MAX_CYCLE_DAY, dtype=np.float64)
+
+    by_user = {}
+    for user_id, d, value in rows:
+        by_user.setdefault(user_id, []).append((d.toordinal(), value))
+
+    for user_id, items in by_user.items():
+        starts = starts_by_user.get(user_id)
+        if not starts:
+            continue
+        start_ord = np.array([s.toordinal() for s in starts])
+        day_ord = np.array([o for o, _ in items])
+        idx = np.searchsorted(start_ord, day_ord, side="right") - 1
+        cycle_day = day_ord - start_ord[np.clip(idx, 0, None)] + 1
+        ok = (idx >= 0) & (cycle_day <= MAX_CYCLE_DAY)
+
+        for j in np.flatnonzero(ok):
+            classes = encode(items[j][1])
+            if classes:
+                day = cycle_day[j] - 1
+                totals[day] += 1
+                counts[day, classes] += 1
+
+    return counts, totals
+
+
+def train():
+    """
+    Fits all models from the full history. Returns (arrays, meta).
+    """
+    import numpy as np
+
+    starts_by_user = _user_starts()
+
+    # Cycle length: one sample per observed cycle after the first
+    X, y = [], []
+    for starts in starts_by_user.values():
+        lengths = cycle_lengths(starts)
+        for i in range(1, len(lengths)):
+            X.append(features(lengths[:i]))
+            y.append(lengths[i])
+
+    if len(y) >= 10:
+        X, y = np.array(X), np.array(y, dtype=np.float64)
+        reg = RIDGE_LAMBDA * np.eye(X.shape[1])
+        reg[0, 0] = 0.0  # don't penalise the bias
+        weights = np.linalg.solve(X.T @ X + reg, X.T @ y)
+        mae = float(np.mean(np.abs(X @ weights - y)))
+    else:
+        # Not enough data: predict the user's mean
+        weights = np.zeros(HISTORY + 3)
+        weights[HISTORY + 1] = 1.0
+        mae = None
+
+    sym_index = {s: i for i, s in enumerate(SYMPTOMS)}
+    sym_rows = _all_rows(SymptomLog, "user_id", "date", "symptoms")
+    sym_counts, sym_totals = _cycle_day_table(
+        np, starts_by_user, sym_rows, len(SYMPTOMS),
+        lambda v: sorted({sym_index[s] for s in (v or []) if s in sym_index}),
+    )
+    # P(symptom present | cycle day)
+    symptom_probs = (sym_counts + SMOOTHING) / (sym_totals[:, None] + 2 * SMOOTHING)
+
+    mood_index = {m: i for i, m in enumerate(MOODS)}
+    mood_rows = _all_rows(MoodLog, "user_id", "date", "mood")
+    mood_counts, mood_totals = _cycle_day_table(
+        np, starts_by_user, mood_rows, len(MOODS),
+        lambda v: [mood_index[v]] if v in mood_index else [],
+    )
+    # P(mood | cycle day)
+    mood_probs = (mood_counts + SMOOTHING) / (mood_totals[:, None] + len(MOODS) * SMOOTHING)
+
+    arrays = {
+        "cycle_weights": weights.astype(np.float64),
+        "symptom_probs": symptom_probs.astype(np.float32),
+        "mood_probs": mood_probs.astype(np.float32),
+        "symptom_day_samples": sym_totals.astype(np.int64),
+        "mood_day_samples": mood_totals.astype(np.int64),
+    }
+    meta = {
+        "version": MODEL_VERSION,
+        "trained_at": date.today().isoformat(),
+        "cycle_samples": len(y),
+        "cycle_mae": mae,
+        "symptom_samples": int(sym_totals.sum()),
+        "mood_samples": int(mood_totals.sum()),
+        "symptoms": SYMPTOMS,
+        "moods": MOODS,
+    }
+    return arrays, meta
+
+
+def save(arrays, meta, path=None):
+    import numpy as np
+
+    path = path or _model_dir()
+    path.mkdir(parents=True, exist_ok=True)
+    for name, arr in arrays.items():
+        np.save(path / f"{name}.npy", arr)
+    (path / "meta.json").write_text(json.dumps(meta, indent=2))
+
+
+# ---------------------------
+# Serving (loaded once per worker)
+# ---------------------------
+
+def _day_known(day_samples, cycle_day):
+    return 1 <= cycle_day <= MAX_CYCLE_DAY and day_samples[cycle_day - 1] >= MIN_DAY_SAMPLES
+
+
+class CycleModel:
+    def __init__(self, path):
+        import numpy as np
+
+        self.meta = json.loads((path / "meta.json").read_text())
+        # Tiny: keep as Python floats so predict_cycle_length avoids NumPy overhead
+        self.weights = np.load(path / "cycle_weights.npy").tolist()
+        self.symptom_probs = np.load(path / "symptom_probs.npy", mmap_mode="r")
+        self.mood_probs = np.load(path / "mood_probs.npy", mmap_mode="r")
+        self.symptom_day_samples = np.load(path / "symptom_day_samples.npy").tolist()
+        self.mood_day_samples = np.load(path / "mood_day_samples.npy").tolist()
+        self.symptoms = self.meta["symptoms"]
+        self.moods = self.meta["moods"]
+
+    def predict_cycle_length(self, lengths) -> float:
+        x = features(lengths)
+        pred = sum(w * v for w, v in zip(self.weights, x))
+        return round(min(max(pred, MIN_CYCLE), MAX_CYCLE), 1)
+
+    def predict_symptoms(self, cycle_day: int, top: int = 3):
+        """
+        None when the cycle day is outside the table or had too few training samples.
+        """
+        if not _day_known(self.symptom_day_samples, cycle_day):
+            return None
+        row = self.symptom_probs[cycle_day - 1]
+        ranked = sorted(range(len(self.symptoms)), key=lambda i: row[i], reverse=True)[:top]
+        return [{"symptom": self.symptoms[i], "probability": round(float(row[i]), 3)} for i in ranked]
+
+    def predict_mood(self, cycle_day: int):
+        if not _day_known(self.mood_day_samples, cycle_day):
+            return None
+        row = self.mood_probs[cycle_day - 1]
+        i = max(range(len(self.moods)), key=lambda j: row[j])
+        return {"mood": self.moods[i], "probability": round(float(row[i]), 3)}
+
+
+_model = None
+_model_lock = threading.Lock()
+_no_model_key = None  # (dir, meta.json mtime or None) when no usable model was found
+
+
+def _artifact_key(path):
+    try:
+        return str(path), (path / "meta.json").stat().st_mtime_ns
+    except OSError:
+        return str(path), None
+
+
+def _load(path):
+    if not (path / "meta.json").exists():
+        return None
+    try:
+        model = CycleModel(path)
+    except ImportError:
+        return None
+    if model.meta.get("version") != MODEL_VERSION:
+        return None
+    return model
+
+
+def get_model():
+    """
+    Returns the trained CycleModel, or None if no artifact exists / NumPy is missing
+    / the version does not match. A miss is remembered until meta.json changes,
+    so requests only pay for a stat() instead of re-reading the artifact.
+    """
+    global _model, _no_model_key
+    if _model is not None:
+        return _model
+    path = _model_dir()
+    key = _artifact_key(path)
+    if key == _no_model_key:
+        return None
+    with _model_lock:
+        if _model is None and key != _no_model_key:
+            _model = _load(path)
+            if _model is None:
+                _no_model_key = key
+    return _model
+
+
+def reset_model():
+    global _model, _no_model_key
+    _model = None
+    _no_model_key = None
+
+
+def predict_for_starts(model, starts, today):
+    """
+    starts: oldest -> newest. Returns the ML prediction block or None.
+    """
+    if model is None or not starts:
+        return None
+    length = model.predict_cycle_length(cycle_lengths(starts))
+    cycle_day = (today - starts[-1]).days + 1
+    return {
+        "cycle_length": length,
+        "likely_symptoms": model.predict_symptoms(cycle_day),
+        "likely_mood": model.predict_mood(cycle_day),
+    }
+
+
+def stored_prediction(pred, starts, today):
+    """
+    The UserPrediction from `manage.py predict_all_users` in the same shape as
+    predict_for_starts(), or None if it is stale: other model version, scored
+    on another day (symptoms depend on the cycle day) or before the latest
+    period start changed.
+    """
+    if pred is None or not starts:
+        return None
+    if (pred.model_version != MODEL_VERSION or pred.last_start != starts[-1]
+            or timezone.localdate(pred.updated_at) != today):
+        return None
+    return {
+        "cycle_length": pred.cycle_length,
+        "likely_symptoms": pred.likely_symptoms or None,
+        "likely_mood": {"mood": pred.likely_mood, "probability": pred.mood_probability}
+        if pred.likely_mood else None,
+    }
@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
+
+from .sharding import UserShardedManager
 class UserProfile(models.Model):
     TONE_CHOICES = [
         ("gentle", "Gentle"),
@@ -25,13 +27,16 @@ class MoodLog(models.Model):
         ("stressed", "Stressed"),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mood_logs")
+    # db_constraint=False: rows may live on a shard database (core/sharding.py)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mood_logs", db_constraint=False)
     date = models.DateField()
     mood = models.CharField(max_length=20, choices=MOOD_CHOICES)
     intensity = models.IntegerField(default=5)  # 1-10
     note = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserShardedManager()
+
     class Meta:
         unique_together = ("user", "date")  # one mood per day (edit if needed)
         ordering = ["-date", "-created_at"]
@@ -52,13 +57,15 @@ class SymptomLog(models.Model):
         ("mood_swings", "Mood Swings"),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="symptom_logs")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="symptom_logs", db_constraint=False)
     date = models.DateField()
     symptoms = models.JSONField(default=list)  # stores list like ["cramps","fatigue"]
     severity = models.IntegerField(default=5)  # 1-10
     note = models.TextField(blank=True, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserShardedManager()
+
     class Meta:
         unique_together = ("user", "date")
         ordering = ["-date", "-created_at"]
@@ -74,7 +81,7 @@ class PeriodLog(models.Model):
         ("heavy", "Heavy"),
     ]
 
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="period_logs")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="period_logs", db_constraint=False)
     start_date = models.DateField()
     end_date = models.DateField(null=True, blank=True)
 
@@ -87,17 +94,171 @@ class PeriodLog(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserShardedManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "start_date"]),  # calendar range scans
+        ]
+
     def __str__(self):
         return f"{self.user.username} | {self.start_date} → {self.end_date or '-'}"
 class ChatMessage(models.Model):
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_messages")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_messages", db_constraint=False)
     role = models.CharField(max_length=10)  # "user" or "assistant"
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = UserShardedManager()
+
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["user", "created_at"]),  # history + retention scans
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} ({self.role}) {self.created_at}"
+
+
+class ChatArchive(models.Model):
+    """
+    Old chat messages moved out of ChatMessage by the compaction job.
+    `payload` is zlib-compressed JSON: [{"role", "content", "created_at"}, ...]
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="chat_archives")
+    first_message_at = models.DateTimeField()
+    last_message_at = models.DateTimeField()
+    message_count = models.IntegerField()
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["first_message_at"]
+
+    def __str__(self):
+        return f"{self.user.username} archive ({self.message_count} msgs)"
+
+
+class AICallLog(models.Model):
+    """
+    Append-only record of every upstream LLM call (no user content).
+    Rotated by `manage.py rotate_ai_logs`.
+    """
+    STATUS_CHOICES = [
+        ("ok", "OK"),
+        ("error", "Error"),
+    ]
+
+    endpoint = models.CharField(max_length=50)
+    model = models.CharField(max_length=100)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES)
+    error_class = models.CharField(max_length=100, blank=True, default="")
+    error_message = models.CharField(max_length=500, blank=True, default="")
+    latency_ms = models.IntegerField()
+    prompt_chars = models.IntegerField(default=0)
+    prompt_tokens = models.IntegerField(default=0)  # estimate, core/prompts.count_tokens
+    trimmed_sections = models.CharField(max_length=200, blank=True, default="")  # over budget, comma-separated
+    response_chars = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.endpoint} {self.model} {self.status} {self.latency_ms}ms"
+
+
+class UserPrediction(models.Model):
+    """
+    Latest batch output of the local ML model (`manage.py predict_all_users`).
+    Served by the dashboard while fresh (core/ml.stored_prediction).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="prediction")
+    cycle_length = models.FloatField()
+    next_period = models.DateField()
+    last_start = models.DateField(null=True)  # latest period start when scored
+    likely_symptoms = models.JSONField(default=list)  # [{"symptom": "cramps", "probability": 0.61}, ...]
+    likely_mood = models.CharField(max_length=20, blank=True, default="")
+    mood_probability = models.FloatField(null=True)
+    model_version = models.IntegerField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username} | next {self.next_period} ({self.cycle_length}d)"
+
+
+class CycleAnomaly(models.Model):
+    """
+    Precomputed anomaly flags (core/anomalies.py), kept up to date on
+    PeriodLog / SymptomLog writes so insights don't ask the LLM to find them.
+    """
+    KIND_CHOICES = [
+        ("cycle_length", "Cycle length"),
+        ("period_length", "Period length"),
+        ("symptom_severity", "Symptom severity"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="anomalies")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    date = models.DateField()  # start_date / symptom date that triggered the flag
+    value = models.FloatField()
+    baseline = models.FloatField(null=True, blank=True)  # rolling mean it was compared to
+    zscore = models.FloatField(null=True, blank=True)
+    detail = models.CharField(max_length=200)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("user", "kind", "date")
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"{self.user.username} | {self.kind} | {self.date}"
+
+
+class ShardAssignment(models.Model):
+    """
+    Which shard database holds a user's log rows (see core/sharding.py).
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="shard")
+    alias = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.alias}"
+
+
+class MoodTrend(models.Model):
+    """
+    Per-user mood aggregates maintained on MoodLog writes (core/mood_trends.py).
+    bucket: "YYYY-MM-DD" for day / week (Monday), phase name for phase.
+    """
+    GRANULARITY_CHOICES = [
+        ("day", "Day"),
+        ("week", "Week"),
+        ("phase", "Cycle phase"),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="mood_trends")
+    granularity = models.CharField(max_length=10, choices=GRANULARITY_CHOICES)
+    bucket = models.CharField(max_length=20)
+    n = models.IntegerField(default=0)
+    intensity_sum = models.IntegerField(default=0)
+    counts = models.JSONField(default=dict)  # {"happy": 3, "tired": 1, ...}
+
+    class Meta:
+        unique_together = ("user", "granularity", "bucket")
+
+    def __str__(self):
+        return f"{self.user.username} | {self.granularity} {self.bucket} (n={self.n})"
+
+
+class AuthToken(models.Model):
+    """
+    API token with a sliding expiry (core/tokens.py). A user may hold one per device.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="auth_tokens")
+    created_at = models.DateTimeField()
+    last_used = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
 
     def __str__(self):
-        return f"{self.user.username} ({self.role}) {self.created_at}"    
-    
+        return f"{self.user.username} | expires {self.expires_at:%Y-%m-%d %H:%M}"
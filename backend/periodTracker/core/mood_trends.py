@@ -0,0 +1,237 @@
+# core/mood_trends.py
+# Precomputed mood trends for the insights page.
+#
+# MoodTrend rows (day / week / cycle phase buckets) are updated on every
+# MoodLog create, update and delete, so the trends endpoint only reads a
+# bounded number of aggregate rows and never scans MoodLog.
+# Phase buckets depend on period start dates: when a PeriodLog is added or
+# removed, only moods from that start up to the next start are re-bucketed.
+
+from datetime import timedelta
+
+from django.db import transaction
+
+from . import cycle
+from .models import MoodLog, MoodTrend, PeriodLog
+
+MOODS = [key for key, _ in MoodLog.MOOD_CHOICES]
+PHASES = ["Menstrual phase", "Follicular phase", "Ovulation window", "Luteal phase"]
+MAX_DAYS = 365
+
+
+def _week_start(d):
+    return d - timedelta(days=d.weekday())
+
+
+def _phase_for(user, d):
+    start = (
+        PeriodLog.objects.for_user(user)
+        .filter(start_date__lte=d)
+        .order_by("-start_date")
+        .values_list("start_date", flat=True)
+        .first()
+    )
+    if start is None:
+        return None
+    return cycle.phase_name((d - start).days + 1)
+
+
+def _buckets(user, d):
+    out = [("day", d.isoformat()), ("week", _week_start(d).isoformat())]
+    phase = _phase_for(user, d)
+    if phase:
+        out.append(("phase", phase))
+    return out
+
+
+def _apply_delta(user, granularity, bucket, n, intensity_sum, counts):
+    row, _ = MoodTrend.objects.select_for_update().get_or_create(
+        user=user, granularity=granularity, bucket=bucket,
+    )
+    row.n += n
+    row.intensity_sum += intensity_sum
+    for mood, c in counts.items():
+        row.counts[mood] = row.counts.get(mood, 0) + c
+        if row.counts[mood] <= 0:
+            del row.counts[mood]
+    if row.n <= 0:
+        row.delete()
+    else:
+        row.save(update_fields=["n", "intensity_sum", "counts"])
+
+
+def _apply(user, buckets, mood, intensity, sign):
+    for granularity, bucket in buckets:
+        _apply_delta(user, granularity, bucket, sign, sign * intensity, {mood: sign})
+
+
+def on_mood_saved(user, log, old=None):
+    """
+    old: (date, mood, intensity) before an update, or None for a create.
+    """
+    with transaction.atomic():
+        if old is not None:
+            _apply(user, _buckets(user, old[0]), old[1], old[2], -1)
+        _apply(user, _buckets(user, log.date), log.mood, log.intensity, +1)
+
+
+def on_mood_deleted(user, log):
+    with transaction.atomic():
+        _apply(user, _buckets(user, log.date), log.mood, log.intensity, -1)
+
+
+def on_period_start_changed(user, start, added):
+    """
+    Re-buckets moods in [start, next start) after a period starting on
+    `start` was added (added=True) or deleted.
+    """
+    logs = PeriodLog.objects.for_user(user)
+    if logs.filter(start_date=start).count() != (1 if added else 0):
+        return  # another log with the same start: attribution unchanged
+    prev = logs.filter(start_date__lt=start).order_by("-start_date").values_list("start_date", flat=True).first()
+    nxt = logs.filter(start_date__gt=start).order_by("start_date").values_list("start_date", flat=True).first()
+
+    moods = MoodLog.objects.for_user(user).filter(date__gte=start)
+    if nxt:
+        moods = moods.filter(date__lt=nxt)
+    old_base, new_base = (prev, start) if added else (start, prev)
+
+    deltas = {}
+    for d, mood, intensity in moods.values_list("date", "mood", "intensity"):
+        for base, sign in ((old_base, -1), (new_base, +1)):
+            if base is None:
+                continue
+            t = deltas.setdefault(cycle.phase_name((d - base).days + 1), {"n": 0, "sum": 0, "counts": {}})
+            t["n"] += sign
+            t["sum"] += sign * intensity
+            t["counts"][mood] = t["counts"].get(mood, 0) + sign
+
+    with transaction.atomic():
+        for phase, t in deltas.items():
+            if t["n"] or t["sum"] or any(t["counts"].values()):
+                _apply_delta(user, "phase", phase, t["n"], t["sum"], t["counts"])
+
+
+def rebuild_phases(user):
+    """
+    Recomputes all of the user's phase buckets (rebuild_user / backfill).
+    """
+    starts = list(PeriodLog.objects.for_user(user).order_by("start_date").values_list("start_date", flat=True))
+    totals = {}
+    if starts:
+        moods = MoodLog.objects.for_user(user).filter(date__gte=starts[0]).order_by("date")
+        i = 0
+        for d, mood, intensity in moods.values_list("date", "mood", "intensity"):
+            while i + 1 < len(starts) and starts[i + 1] <= d:
+                i += 1
+            t = totals.setdefault(cycle.phase_name((d - starts[i]).days + 1), {"n": 0, "sum": 0, "counts": {}})
+            t["n"] += 1
+            t["sum"] += intensity
+            t["counts"][mood] = t["counts"].get(mood, 0) + 1
+
+    with transaction.atomic():
+        MoodTrend.objects.filter(user=user, granularity="phase").delete()
+        MoodTrend.objects.bulk_create([
+            MoodTrend(user=user, granularity="phase", bucket=phase,
+                      n=t["n"], intensity_sum=t["sum"], counts=t["counts"])
+            for phase, t in totals.items()
+        ])
+
+
+def rebuild_user(user):
+    rows = MoodLog.objects.for_user(user).values_list("date", "mood", "intensity")
+    totals = {}
+    for d, mood, intensity in rows:
+        for key in [("day", d.isoformat()), ("week", _week_start(d).isoformat())]:
+            t = totals.setdefault(key, {"n": 0, "sum": 0, "counts": {}})
+            t["n"] += 1
+            t["sum"] += intensity
+            t["counts"][mood] = t["counts"].get(mood, 0) + 1
+
+    with transaction.atomic():
+        MoodTrend.objects.filter(user=user).exclude(granularity="phase").delete()
+        MoodTrend.objects.bulk_create([
+            MoodTrend(user=user, granularity=g, bucket=b, n=t["n"], intensity_sum=t["sum"], counts=t["counts"])
+            for (g, b), t in totals.items()
+        ])
+    rebuild_phases(user)
+
+
+# ---------------------------
+# Chart-ready series
+# ---------------------------
+
+def _mean(total, n):
+    return round(total / n, 2) if n else None
+
+
+def _rolling(days, sums, ns, width):
+    """
+    Mean intensity over the trailing `width` days, via prefix sums.
+    """
+    ps, pn = [0], [0]
+    for s, n in zip(sums, ns):
+        ps.append(ps[-1] + s)
+        pn.append(pn[-1] + n)
+    out = []
+    for i in range(width - 1, len(sums)):
+        lo = i + 1 - width
+        out.append(_mean(ps[i + 1] - ps[lo], pn[i + 1] - pn[lo]))
+    return out[-days:]
+
+
+def _distribution(rows):
+    return {m: [r.counts.get(m, 0) for r in rows] for m in MOODS}
+
+
+def trends(user, end, days=30):
+    days = max(1, min(days, MAX_DAYS))
+    start = end - timedelta(days=days - 1)
+    lookback = start - timedelta(days=29)  # for the 30-day rolling window
+
+    day_rows = {
+        r.bucket: r
+        for r in MoodTrend.objects.filter(
+            user=user, granularity="day",
+            bucket__gte=lookback.isoformat(), bucket__lte=end.isoformat(),
+        )
+    }
+    span = [lookback + timedelta(days=i) for i in range((end - lookback).days + 1)]
+    sums = [day_rows[d.isoformat()].intensity_sum if d.isoformat() in day_rows else 0 for d in span]
+    ns = [day_rows[d.isoformat()].n if d.isoformat() in day_rows else 0 for d in span]
+
+    window = span[-days:]
+    daily_rows = [day_rows.get(d.isoformat()) for d in window]
+
+    week_rows = list(
+        MoodTrend.objects.filter(
+            user=user, granularity="week",
+            bucket__gte=_week_start(start).isoformat(), bucket__lte=end.isoformat(),
+        ).order_by("bucket")
+    )
+
+    phase_rows = {r.bucket: r for r in MoodTrend.objects.filter(user=user, granularity="phase")}
+    phases = [phase_rows[p] for p in PHASES if p in phase_rows]
+
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "moods": MOODS,
+        "daily": {
+            "dates": [d.isoformat() for d in window],
+            "mood": [max(r.counts, key=r.counts.get) if r else None for r in daily_rows],
+            "intensity": [_mean(r.intensity_sum, r.n) if r else None for r in daily_rows],
+            "rolling_7": _rolling(days, sums, ns, 7),
+            "rolling_30": _rolling(days, sums, ns, 30),
+        },
+        "weekly": {
+            "weeks": [r.bucket for r in week_rows],
+            "mean_intensity": [_mean(r.intensity_sum, r.n) for r in week_rows],
+            "distribution": _distribution(week_rows),
+        },
+        "phases": {
+            "phases": [r.bucket for r in phases],
+            "mean_intensity": [_mean(r.intensity_sum, r.n) for r in phases],
+            "distribution": _distribution(phases),
+        },
+    }
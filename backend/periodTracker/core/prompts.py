@@ -0,0 +1,166 @@
+# core/prompts.py
+# Prompt registry for the AI endpoints.
+#
+# Each endpoint has one PromptTemplate. Its system text (role + endpoint
+# rules + the shared safety rules) is built once at import and is identical
+# for every user and request. Providers can therefore cache it as a
+# prefix (see GeminiProvider in core/llm.py). The user part is a pre-parsed
+# template filled with request fields plus the user-context sections.
+#
+# Token counts are estimates (~4 UTF-8 bytes per token). When a prompt is
+# over its endpoint budget (settings.LLM["budgets"]), context sections are
+# dropped lowest priority first (highest number); priority 0 is never dropped.
+
+import logging
+import string
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUDGETS = {
+    "chatbot": 1500,
+    "insights": 1200,
+    "mood_tip": 400,
+    "symptom_tip": 400,
+}
+
+SHARED_RULES = [
+    "You are not a doctor. No diagnosis.",
+]
+
+
+def count_tokens(text: str) -> int:
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+class Section:
+    """
+    One block of user context, e.g. Section("recent_notes", "Recent notes: ...", 3).
+    """
+
+    def __init__(self, name, text, priority=1):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.tokens = count_tokens(text)
+
+
+class Prompt:
+    def __init__(self, endpoint, system, user, dropped):
+        self.endpoint = endpoint
+        self.system = system
+        self.user = user
+        self.dropped = dropped  # names of sections trimmed to fit the budget (logged in AICallLog)
+        self.tokens = count_tokens(system) + count_tokens(user)
+
+
+def _compile(template):
+    """
+    [(literal, field_name_or_None), ...] parsed once, so rendering is a join.
+    """
+    return [(literal, field) for literal, field, _, _ in string.Formatter().parse(template)]
+
+
+class PromptTemplate:
+    def __init__(self, endpoint, role, rules, user):
+        self.endpoint = endpoint
+        self.system = f"{role}\nRules:\n" + "".join(f"- {r}\n" for r in [*rules, *SHARED_RULES])
+        self.system_tokens = count_tokens(self.system)
+        self._parts = _compile(user)
+
+    def budget(self) -> int:
+        budgets = getattr(settings, "LLM", {}).get("budgets", {})
+        return budgets.get(self.endpoint) or DEFAULT_BUDGETS.get(self.endpoint, 2000)
+
+    def _fill(self, fields):
+        return "".join(literal + (str(fields[field]) if field else "") for literal, field in self._parts)
+
+    def render(self, sections=(), **fields) -> Prompt:
+        """
+        `sections` fill the {context} field; other fields come from kwargs.
+        """
+        kept = list(sections)
+        dropped = []
+        fields["context"] = ""
+        fixed = self.system_tokens + count_tokens(self._fill(fields))
+        budget = self.budget()
+
+        # drop lowest priority first (later sections first among equals)
+        while fixed + sum(s.tokens for s in kept) > budget:
+            victims = [s for s in kept if s.priority > 0]
+            if not victims:
+                break
+            victim = max(reversed(victims), key=lambda s: s.priority)
+            kept.remove(victim)
+            dropped.append(victim.name)
+
+        fields["context"] = "".join(s.text for s in kept)
+        prompt = Prompt(self.endpoint, self.system, self._fill(fields), dropped)
+        if prompt.tokens > budget:
+            logger.warning("%s prompt over budget (%d > %d tokens)", self.endpoint, prompt.tokens, budget)
+        return prompt
+
+
+# ---------------------------
+# Registry
+# ---------------------------
+
+REGISTRY = {
+    t.endpoint: t
+    for t in [
+        PromptTemplate(
+            "chatbot",
+            "You are a helpful Period Tracker assistant.",
+            [
+                "Be supportive and medically cautious.",
+                "If severe pain, heavy bleeding, fainting, fever, pregnancy concern, "
+                "or urgent symptoms: advise seeking a clinician.",
+                "Personalize using the user context.",
+                "Keep answers clear, short, and practical.",
+            ],
+            "USER CONTEXT:\n{context}\nUSER QUESTION:\n{question}",
+        ),
+        PromptTemplate(
+            "insights",
+            "You are a period-tracking insights assistant.",
+            [
+                "Use ONLY the given tracking data; do not invent data.",
+                "Give 3–6 bullet insights.",
+                "FLAGGED PATTERNS were detected by rules; mention each one plainly.",
+                "If there are flagged patterns, add 1 safety note.",
+                "Friendly tone.",
+            ],
+            "Generate helpful cycle insights based on:\n{context}",
+        ),
+        PromptTemplate(
+            "mood_tip",
+            "You are a supportive mood assistant for menstrual health.",
+            [
+                "Validate feelings.",
+                "Give gentle coping tips.",
+                "Encourage rest and self-care.",
+                "If the user mentions self-harm or feeling unsafe, suggest professional help.",
+            ],
+            "The user feels '{mood}' with intensity {intensity}. Give gentle advice.",
+        ),
+        PromptTemplate(
+            "symptom_tip",
+            "You are a menstrual symptom relief assistant.",
+            [
+                "Give general relief tips (hydration, heat pad, rest, gentle stretching, "
+                "OTC suggestions in general terms).",
+                "If severity is high (8+), heavy bleeding, fainting, fever, pregnancy concern: "
+                "advise seeing a doctor.",
+                "Keep answer short and practical (5-8 bullet points).",
+            ],
+            "The user selected symptoms: {symptoms}.\n"
+            "Severity level: {severity}/10.\n"
+            "Give general relief tips and one safety note.",
+        ),
+    ]
+}
+
+
+def render(endpoint, sections=(), **fields) -> Prompt:
+    return REGISTRY[endpoint].render(sections, **fields)
@@ -0,0 +1,27 @@
+# core/renderers.py
+# JSON renderer backed by orjson when it is installed (pip install orjson).
+# Falls back to DRF's JSONRenderer otherwise, so orjson stays optional.
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+_encoder = DjangoJSONEncoder()
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+    format = "json"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return JSONRenderer().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=_encoder.default)
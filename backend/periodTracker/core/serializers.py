@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
 from .models import PeriodLog, UserProfile, ChatMessage, MoodLog, SymptomLog
 
@@ -39,3 +41,74 @@ class SymptomLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = SymptomLog
         fields = ["id", "date", "symptoms", "severity", "note", "created_at"]
+
+
+# ---------------------------
+# Fast read path for list endpoints
+# values() rows -> plain dicts, no per-row field machinery.
+# Output matches the ModelSerializers above.
+# ---------------------------
+
+PERIOD_LOG_FIELDS = PeriodLogSerializer.Meta.fields
+MOOD_LOG_FIELDS = MoodLogSerializer.Meta.fields
+SYMPTOM_LOG_FIELDS = SymptomLogSerializer.Meta.fields
+
+
+def _iso_date(d):
+    return d.isoformat() if d is not None else None
+
+
+def _iso_datetime(dt):
+    # Same as DRF's DateTimeField: current time zone, UTC as "Z"
+    if dt is None:
+        return None
+    if settings.USE_TZ and timezone.is_aware(dt):
+        dt = timezone.localtime(dt)
+    value = dt.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+_CONVERTERS = {
+    "start_date": _iso_date,
+    "end_date": _iso_date,
+    "date": _iso_date,
+    "created_at": _iso_datetime,
+}
+
+
+def fast_rows(queryset, fields):
+    """
+    Returns a list of dicts for `fields` straight from values_list().
+    """
+    convs = [_CONVERTERS.get(f) for f in fields]
+    out = []
+    for row in queryset.values_list(*fields):
+        out.append({
+            f: (c(v) if c else v)
+            for f, c, v in zip(fields, convs, row)
+        })
+    return out
+
+
+def fast_columns(queryset, fields):
+    """
+    Columnar layout for calendar/chart views:
+    {"count": n, "<field>": [v0, v1, ...], ...}
+    """
+    cols = {f: [] for f in fields}
+    appenders = [cols[f].append for f in fields]
+    convs = [_CONVERTERS.get(f) for f in fields]
+    n = 0
+    for row in queryset.values_list(*fields):
+        for append, c, v in zip(appenders, convs, row):
+            append(c(v) if c else v)
+        n += 1
+    return {"count": n, **cols}
+
+
+def fast_list(queryset, fields, layout="rows"):
+    if layout == "columns":
+        return fast_columns(queryset, fields)
+    return fast_rows(queryset, fields)
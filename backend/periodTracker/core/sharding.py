@@ -0,0 +1,172 @@
+# core/sharding.py
+# User-id sharding for the per-user log tables
+# (PeriodLog, MoodLog, SymptomLog, ChatMessage).
+#
+# settings.USER_SHARDS lists the database aliases holding those tables;
+# everything else (auth, profiles, archives, flags...) stays in "default".
+# With a single shard (the default setup) this is a no-op.
+#
+# - shard_for(user_id): alias for a user. Placement is pinned in
+#   ShardAssignment on first use, so changing USER_SHARDS never moves data
+#   implicitly; `manage.py rebalance_shards` moves users explicitly.
+# - Model.objects.for_user(user): queryset on the user's shard;
+#   Model.objects.create(user=...) is routed there too.
+# - ShardRouter: routes instance-based writes (save/create/delete) by user_id.
+# - fan_out(fn): runs fn(alias) on every shard in parallel (cross-shard analytics).
+#
+# The user FKs on sharded models use db_constraint=False, and deleting a
+# User only cascades within "default"; shard rows are removed by
+# `rebalance_shards --purge-orphans`.
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, models
+
+SHARDED_MODELS = {"periodlog", "moodlog", "symptomlog", "chatmessage"}
+
+# Placement lookups are cached; moves are picked up by other processes
+# after this long unless CACHES is shared.
+SHARD_CACHE_SECONDS = 300
+
+
+def all_shards():
+    return list(getattr(settings, "USER_SHARDS", ["default"]))
+
+
+def _cache_key(user_id):
+    return f"shard:{user_id}"
+
+
+def shard_for(user_id) -> str:
+    shards = all_shards()
+    if len(shards) == 1:
+        return shards[0]
+
+    alias = cache.get(_cache_key(user_id))
+    if alias is None:
+        from .models import ShardAssignment
+
+        assignment, _ = ShardAssignment.objects.get_or_create(
+            user_id=user_id,
+            defaults={"alias": shards[user_id % len(shards)]},
+        )
+        alias = assignment.alias
+        cache.set(_cache_key(user_id), alias, SHARD_CACHE_SECONDS)
+    return alias
+
+
+def set_shard(user_id, alias):
+    from .models import ShardAssignment
+
+    ShardAssignment.objects.update_or_create(user_id=user_id, defaults={"alias": alias})
+    cache.set(_cache_key(user_id), alias, SHARD_CACHE_SECONDS)
+
+
+def _user_id(user):
+    return getattr(user, "pk", user)
+
+
+class UserShardedQuerySet(models.QuerySet):
+    def create(self, **kwargs):
+        # QuerySet.create() passes its own db to save(), bypassing the router
+        if self._db is None:
+            uid = kwargs.get("user_id") or _user_id(kwargs.get("user"))
+            if uid is not None:
+                return self.using(shard_for(uid)).create(**kwargs)
+        return super().create(**kwargs)
+
+
+class UserShardedManager(models.Manager.from_queryset(UserShardedQuerySet)):
+    def for_user(self, user):
+        """
+        All rows of `user`, read from the user's shard.
+        """
+        uid = _user_id(user)
+        return self.using(shard_for(uid)).filter(user_id=uid)
+
+    def on_shard_of(self, user):
+        """
+        Unfiltered queryset on the user's shard (bulk_create etc.).
+        """
+        return self.using(shard_for(_user_id(user)))
+
+
+class ShardRouter:
+    """
+    Sends sharded models to the user's shard when the instance is known,
+    and only migrates sharded tables onto non-default shard databases.
+    """
+
+    def __init__(self):
+        # Routers are built on the first query, before any connection opens:
+        # create the directories of SQLite shard files here, not at import.
+        for alias in all_shards():
+            db = settings.DATABASES.get(alias, {})
+            name = str(db.get("NAME") or "")
+            if db.get("ENGINE", "").endswith("sqlite3") and name and not name.startswith((":memory:", "file:")):
+                Path(name).parent.mkdir(parents=True, exist_ok=True)
+
+    def _sharded(self, model):
+        return model._meta.app_label == "core" and model._meta.model_name in SHARDED_MODELS
+
+    def _route(self, model, **hints):
+        if not self._sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is not None and getattr(instance, "user_id", None) is not None:
+            if instance._state.db:
+                return instance._state.db
+            return shard_for(instance.user_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, **hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # user FKs cross databases on purpose (db_constraint=False)
+        if self._sharded(type(obj1)) or self._sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == "default":
+            return True
+        if db in all_shards():
+            return app_label == "core" and model_name in SHARDED_MODELS
+        return None
+
+
+def fan_out(fn, shards=None):
+    """
+    Runs fn(alias) on each shard in parallel threads; returns results in shard order.
+    `fn` must fully evaluate its queries (list(), count(), ...).
+    """
+    shards = shards or all_shards()
+    if len(shards) == 1:
+        return [fn(shards[0])]
+
+    def run(alias):
+        try:
+            return fn(alias)
+        finally:
+            connections.close_all()  # this thread's connections only
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+        return list(pool.map(run, shards))
+
+
+def users_with_rows(model):
+    """
+    Distinct user ids that have rows of `model`, across all shards.
+    """
+    parts = fan_out(lambda alias: list(
+        model.objects.using(alias).order_by().values_list("user_id", flat=True).distinct()
+    ))
+    return sorted({uid for part in parts for uid in part})
+
@@ -1,3 +1,981 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import ai_log, anomalies, auth_guard, chat_retention, chat_store, cycle, hashers, llm, ml, mood_trends, prompts, tokens
+from .intents import classify
+from .management.commands.rebalance_shards import move_user
+from .models import (
+    AICallLog, AuthToken, ChatArchive, ChatMessage, CycleAnomaly, MoodLog, MoodTrend, PeriodLog,
+    ShardAssignment, SymptomLog, UserPrediction,
+)
+from .serializers import (
+    MOOD_LOG_FIELDS, PERIOD_LOG_FIELDS, SYMPTOM_LOG_FIELDS, MoodLogSerializer, PeriodLogSerializer,
+    SymptomLogSerializer, fast_rows,
+)
+from .sharding import all_shards, shard_for
+
+
+def local_llm():
+    return override_settings(LLM={**settings.LLM, "provider": "local"})
+
+
+class capture_queries:
+    """
+    CaptureQueriesContext over every database: log tables may live on a shard.
+    """
+
+    def __enter__(self):
+        self._contexts = [CaptureQueriesContext(connections[alias]) for alias in connections]
+        for c in self._contexts:
+            c.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        for c in self._contexts:
+            c.__exit__(*exc)
+
+    @property
+    def captured_queries(self):
+        return [q for c in self._contexts for q in c.captured_queries]
+
+    def __len__(self):
+        return len(self.captured_queries)
+
+
+class AuthedTestCase(TestCase):
+    databases = "__all__"  # user log rows live on the user's shard
+
+    def setUp(self):
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+# ---------------------------
+# Chatbot fast path (core/intents.py)
+# ---------------------------
+
+class ClassifyTests(SimpleTestCase):
+    def test_short_cycle_questions_hit(self):
+        cases = {
+            "When is my next period?": "next_period",
+            "when's my period due": "next_period",
+            "Am I in my fertile window today?": "fertile_window",
+            "am i fertile": "fertile_window",
+            "When will I ovulate?": "ovulation",
+            "What day of my cycle is it?": "cycle_phase",
+            "Which phase am I in?": "cycle_phase",
+        }
+        for prompt, intent in cases.items():
+            self.assertEqual(classify(prompt), intent, prompt)
+
+    def test_open_or_sensitive_messages_go_to_llm(self):
+        for prompt in [
+            "Can stress delay ovulation?",
+            "I missed my next period, could I be pregnant?",
+            "My period is late, when is my next period?",
+            "Is heavy bleeding normal before my next period?",
+            "Why does ovulation hurt?",
+            "tell me about the fertile window",
+            "When is my next period? " + "x" * 100,
+        ]:
+            self.assertIsNone(classify(prompt), prompt)
+
+
+class ChatbotFastPathTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        llm.reset_provider()
+        self.addCleanup(llm.reset_provider)
+        self.client.post("/api/period-logs/", {"start_date": "2026-01-01"}, format="json")
+
+    def test_fast_path_answers_without_llm(self):
+        with local_llm():
+            res = self.client.post("/api/chatbot/", {"prompt": "When is my next period?"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["intent"], "next_period")
+
+    def test_pregnancy_question_uses_llm(self):
+        with local_llm():
+            res = self.client.post(
+                "/api/chatbot/", {"prompt": "I missed my next period, could I be pregnant?"}, format="json"
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn("intent", res.json())
+        self.assertIn("(local:", res.json()["reply"])
+
+
+class GeminiProviderTests(SimpleTestCase):
+    @mock.patch.dict("os.environ", {"GEMINI_API_KEY": "test"})
+    @mock.patch.dict("sys.modules", {"google": None, "google.genai": None})
+    def test_missing_sdk_is_an_llm_error(self):
+        with self.assertRaisesMessage(llm.LLMError, "google-genai is not installed"):
+            llm.GeminiProvider().generate_parts("system", "user", "gemini-2.5-flash")
+
+
+# ---------------------------
+# Dashboard
+# ---------------------------
+
+class DashboardTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        for start in ["2026-01-01", "2026-01-29", "2026-02-26"]:
+            self.client.post("/api/period-logs/", {"start_date": start}, format="json")
+        self.client.post("/api/mood-logs/", {"date": str(timezone.localdate()), "mood": "happy"}, format="json")
+
+    def test_query_count_is_constant_and_cached(self):
+        with capture_queries() as q:
+            res = self.client.get("/api/dashboard/")
+        self.assertEqual(res.status_code, 200)
+        self.assertLessEqual(len(q), 4)
+        with capture_queries() as q:
+            self.client.get("/api/dashboard/")
+        self.assertEqual(len(q), 0)
+
+    def test_long_history_reads_a_bounded_slice(self):
+        PeriodLog.objects.on_shard_of(self.user).bulk_create([
+            PeriodLog(user=self.user, start_date=date(2020, 1, 1) + timedelta(days=28 * i)) for i in range(40)
+        ])
+        with capture_queries() as q:
+            data = self.client.get("/api/dashboard/").json()
+        self.assertLessEqual(len(q), 5)
+        log_sql = [x["sql"] for x in q.captured_queries if "core_periodlog" in x["sql"]]
+        self.assertIn(f"LIMIT {cycle.PREDICTION_HISTORY}", log_sql[0])
+        self.assertEqual(data["log_count"], 43)
+        self.assertEqual(data["recent_logs"][0]["start_date"], "2026-02-26")
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get("/api/dashboard/")
+        self.client.post("/api/period-logs/", {"start_date": "2026-03-26"}, format="json")
+        data = self.client.get("/api/dashboard/").json()
+        self.assertEqual(data["log_count"], 4)
+        self.assertEqual(data["recent_logs"][0]["start_date"], "2026-03-26")
+
+
+# ---------------------------
+# AI call log (core/ai_log.py)
+# ---------------------------
+
+class AICallLogTests(AuthedTestCase):
+    def test_provider_failure_is_logged_not_stored_as_chat(self):
+        failing = mock.Mock(spec=llm.LLMProvider)
+        failing.generate_parts.side_effect = llm.LLMError("quota exceeded")
+        with mock.patch.object(llm, "get_provider", return_value=failing):
+            res = self.client.post("/api/chatbot/", {"prompt": "Can stress change my cycle?"}, format="json")
+        self.assertEqual(res.status_code, 500)
+        log = AICallLog.objects.get()
+        self.assertEqual((log.endpoint, log.status, log.error_class), ("chatbot", "error", "LLMError"))
+        self.assertIn("quota exceeded", log.error_message)
+        self.assertFalse(ChatMessage.objects.for_user(self.user).filter(role="assistant").exists())
+
+    def test_summarize_error_rate_and_percentiles(self):
+        for ms in range(1, 101):
+            ai_log.record_ai_call("chatbot", "gemini:m", ms, 100, error=RuntimeError() if ms % 20 == 0 else None)
+        ai_log.record_ai_call("chatbot", "gemini:m", 9999, 100)
+        AICallLog.objects.filter(latency_ms=9999).update(created_at=timezone.now() - timedelta(hours=48))
+
+        data = ai_log.summarize(hours=24)
+        [group] = data["groups"]
+        self.assertEqual(group["calls"], 100)
+        self.assertEqual(group["error_rate"], 0.05)
+        self.assertEqual((group["p50_ms"], group["p95_ms"]), (51, 95))
+        self.assertEqual(data["error_classes"], [{"error_class": "RuntimeError", "count": 5}])
+
+    def test_health_is_admin_only(self):
+        self.assertEqual(self.client.get("/api/ai/health/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/api/ai/health/").status_code, 200)
+
+
+# ---------------------------
+# Chat persistence (core/chat_store.py)
+# ---------------------------
+
+class ChatStoreTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        chat_store._buffer = None
+        self.addCleanup(setattr, chat_store, "_buffer", None)
+        self.addCleanup(chat_store.flush_pending)
+
+    def buffered(self, flush_size=4):
+        return override_settings(CHAT_PERSISTENCE={"mode": "buffered", "flush_size": flush_size,
+                                                   "flush_interval": 60})
+
+    def messages(self):
+        return list(ChatMessage.objects.for_user(self.user).order_by("id").values_list("role", "content"))
+
+    def test_exchange_is_one_insert_in_one_transaction(self):
+        with mock.patch.object(chat_store, "transaction", wraps=chat_store.transaction) as tx, capture_queries() as q:
+            chat_store.save_exchange(self.user, "hi", "hello")
+        self.assertEqual(tx.atomic.call_count, 1)
+        self.assertEqual(len([x for x in q.captured_queries if x["sql"].startswith("INSERT")]), 1)
+        self.assertEqual(self.messages(), [("user", "hi"), ("assistant", "hello")])
+
+    def test_ai_error_keeps_only_the_user_turn(self):
+        with mock.patch("core.views.llm_text", return_value=(None, "upstream down")):
+            res = self.client.post("/api/chatbot/", {"prompt": "Can stress change my cycle?"}, format="json")
+        self.assertEqual(res.status_code, 500)
+        self.assertEqual(self.messages(), [("user", "Can stress change my cycle?")])
+
+    def test_buffered_mode_flushes_at_flush_size(self):
+        with self.buffered(flush_size=4):
+            chat_store.save_exchange(self.user, "q1", "a1")
+            self.assertEqual(self.messages(), [])
+            chat_store.save_exchange(self.user, "q2", "a2")
+            self.assertEqual(len(self.messages()), 4)
+
+    def test_history_and_clear_see_buffered_rows(self):
+        with self.buffered(flush_size=100):
+            chat_store.save_exchange(self.user, "q1", "a1")
+            history = self.client.get("/api/chat/history/").json()
+            self.assertEqual([m["content"] for m in history], ["q1", "a1"])
+
+            chat_store.save_exchange(self.user, "q2", "a2")
+            self.assertEqual(self.client.delete("/api/chat/clear/").status_code, 200)
+            chat_store.flush_pending()
+            self.assertEqual(self.messages(), [])
+
+
+# ---------------------------
+# Fast list path (core/serializers.py)
+# ---------------------------
+
+class FastListTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.post("/api/period-logs/", {"start_date": "2026-01-01", "end_date": "2026-01-05",
+                                               "flow_level": "light", "notes": "ok"}, format="json")
+        self.client.post("/api/period-logs/", {"start_date": "2026-01-29"}, format="json")
+        self.client.post("/api/mood-logs/", {"date": "2026-01-02", "mood": "calm", "intensity": 4}, format="json")
+        self.client.post("/api/symptom-logs/", {"date": "2026-01-02", "symptoms": ["cramps", "fatigue"],
+                                                "severity": 6, "note": "meh"}, format="json")
+        self.cases = [
+            (PeriodLog, PeriodLogSerializer, PERIOD_LOG_FIELDS),
+            (MoodLog, MoodLogSerializer, MOOD_LOG_FIELDS),
+            (SymptomLog, SymptomLogSerializer, SYMPTOM_LOG_FIELDS),
+        ]
+
+    def assert_parity(self):
+        for model, serializer, fields in self.cases:
+            qs = model.objects.for_user(self.user).order_by("id")
+            expected = [dict(r) for r in serializer(qs, many=True).data]
+            self.assertEqual(fast_rows(qs, fields), expected, model.__name__)
+
+    def test_rows_match_model_serializers(self):
+        self.assert_parity()
+
+    def test_rows_match_in_other_time_zones(self):
+        for tz in ["Asia/Kolkata", "America/New_York"]:
+            with self.settings(TIME_ZONE=tz):
+                self.assert_parity()
+
+    def test_columns_layout(self):
+        data = self.client.get("/api/period-logs/", {"layout": "columns"}).json()
+        self.assertEqual(set(data), {"count", *PERIOD_LOG_FIELDS})
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(data["start_date"], ["2026-01-29", "2026-01-01"])
+        self.assertEqual(data["end_date"], [None, "2026-01-05"])
+        rows = self.client.get("/api/period-logs/").json()
+        self.assertEqual(data["id"], [r["id"] for r in rows])
+
+
+# ---------------------------
+# Calendar (core/timeline.py)
+# ---------------------------
+
+class CalendarRangeTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        for start in ["2026-01-01", "2026-01-29", "2026-02-26"]:
+            self.client.post("/api/period-logs/", {"start_date": start}, format="json")
+
+    def get(self, **params):
+        return self.client.get("/api/calendar/", params)
+
+    def test_window_has_one_entry_per_day(self):
+        res = self.get(**{"from": "2026-03-01", "to": "2026-03-31"})
+        self.assertEqual(res.status_code, 200)
+        days = res.json()["days"]
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days[0]["date"], "2026-03-01")
+        self.assertTrue(any(d["predicted_period"] for d in days))
+
+    def test_out_of_range_dates_are_rejected(self):
+        for params in [
+            {"from": "9999-12-01"},
+            {"from": "0001-01-01", "to": "0001-01-02"},
+            {"from": "9999-01-01", "to": "9999-12-30"},
+            {"from": "9000-01-01", "to": "9000-12-31"},
+            {"from": "2026-13-01"},
+        ]:
+            self.assertEqual(self.get(**params).status_code, 400, params)
+
+    def test_far_window_only_projects_into_the_window(self):
+        res = self.get(**{"from": "2200-01-01", "to": "2200-12-31"})
+        self.assertEqual(res.status_code, 200)
+        days = res.json()["days"]
+        self.assertEqual(len(days), 365)
+        self.assertTrue(any(d["ovulation"] for d in days))
+
+    def test_window_limit(self):
+        self.assertEqual(self.get(**{"from": "2026-01-01", "to": "2027-06-01"}).status_code, 400)
+
+
+# ---------------------------
+# API tokens (core/tokens.py)
+# ---------------------------
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class TokenTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("bob", "bob@example.com", "secret-pass-1")
+        self.client = APIClient()
+        self.key = tokens.issue_token(self.user).key
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.key}")
+
+    def profile_status(self):
+        return self.client.get("/api/profile/").status_code
+
+    def test_cached_lookup_takes_no_queries(self):
+        self.assertEqual(tokens.lookup(self.key), self.user)
+        with capture_queries() as q:
+            for _ in range(10):
+                self.assertEqual(tokens.lookup(self.key), self.user)
+        self.assertEqual(len(q.captured_queries), 0)
+
+    def test_unknown_key_is_negatively_cached(self):
+        self.assertIsNone(tokens.lookup("nope"))
+        with capture_queries() as q:
+            self.assertIsNone(tokens.lookup("nope"))
+        self.assertEqual(len(q.captured_queries), 0)
+
+    def test_expired_token_is_rejected(self):
+        AuthToken.objects.filter(key=self.key).update(expires_at=timezone.now() - timedelta(seconds=1))
+        cache.clear()
+        self.assertEqual(self.profile_status(), 401)
+
+    def test_use_slides_expiry(self):
+        soon = timezone.now() + timedelta(days=1)
+        AuthToken.objects.filter(key=self.key).update(last_used=timezone.now() - timedelta(days=1), expires_at=soon)
+        cache.clear()
+        self.assertEqual(self.profile_status(), 200)
+        tokens.flush_pending()
+        self.assertGreater(AuthToken.objects.get(key=self.key).expires_at, soon + timedelta(days=28))
+
+    def test_logout_revokes(self):
+        self.assertEqual(self.profile_status(), 200)
+        self.assertEqual(self.client.post("/api/logout/").status_code, 200)
+        self.assertEqual(self.profile_status(), 401)
+
+    def test_deactivation_and_password_change_revoke(self):
+        self.assertEqual(self.profile_status(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.profile_status(), 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {tokens.issue_token(self.user).key}")
+        self.assertEqual(self.profile_status(), 200)
+        self.user.set_password("another-pass-2")
+        self.user.save()
+        self.assertEqual(self.profile_status(), 401)
+
+    def test_staff_change_applies_immediately(self):
+        self.assertEqual(self.client.get("/api/ai/health/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/api/ai/health/").status_code, 200)
+        self.user.is_staff = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/ai/health/").status_code, 403)
+
+
+# ---------------------------
+# Symptom logs
+# ---------------------------
+
+class SymptomLogCreateTests(AuthedTestCase):
+    def post(self):
+        return self.client.post("/api/symptom-logs/", {"date": "2026-03-01", "symptoms": ["cramps"]}, format="json")
+
+    def test_duplicate_date_is_a_400(self):
+        self.assertEqual(self.post().status_code, 201)
+        self.assertEqual(self.post().status_code, 400)
+
+    def test_hook_failure_is_not_reported_as_duplicate(self):
+        self.client.raise_request_exception = False
+        with mock.patch("core.views.anomalies.on_symptom_log_changed", side_effect=RuntimeError("boom")):
+            self.assertEqual(self.post().status_code, 500)
+
+
+# ---------------------------
+# Anomalies (core/anomalies.py)
+# ---------------------------
+
+class AnomalyDetectionTests(SimpleTestCase):
+    def test_long_cycle_is_flagged(self):
+        starts = [date(2026, 1, 1) + timedelta(days=28 * i) for i in range(5)]
+        starts.append(starts[-1] + timedelta(days=40))
+        flags = anomalies.detect_period([(s, None) for s in starts])
+        self.assertEqual([(f.kind, f.date, f.value) for f in flags], [("cycle_length", starts[-1], 40)])
+        self.assertEqual(flags[0].baseline, 28.0)
+        self.assertIn("longer", flags[0].detail)
+
+    def test_gaps_and_missing_end_dates_make_no_points(self):
+        logs = [(date(2026, 1, 1), None), (date(2026, 6, 1), date(2026, 6, 5))]
+        self.assertEqual(anomalies._period_points(logs), ([], [(date(2026, 6, 1), 5)]))
+
+    def test_severity_spike_and_severe(self):
+        days = [date(2026, 1, 1) + timedelta(days=i) for i in range(6)]
+        flags = anomalies.detect_severity(list(zip(days, [3, 2, 3, 3, 8, 9])))
+        self.assertEqual([(f.date, f.value) for f in flags], [(days[4], 8), (days[5], 9)])
+        self.assertIn("well above", flags[0].detail)
+        self.assertEqual(anomalies.detect_severity([(days[0], 9)])[0].zscore, None)
+
+    def test_short_history_is_not_flagged(self):
+        days = [date(2026, 1, 1) + timedelta(days=i) for i in range(3)]
+        self.assertEqual(anomalies.detect_severity(list(zip(days, [2, 2, 7]))), [])
+
+
+class AnomalyIncrementalTests(AuthedTestCase):
+    def snapshot(self):
+        return sorted(CycleAnomaly.objects.filter(user=self.user).values_list("kind", "date", "value", "zscore"))
+
+    def assert_matches_rebuild(self):
+        incremental = self.snapshot()
+        anomalies.rebuild_user(self.user)
+        self.assertEqual(incremental, self.snapshot())
+        return incremental
+
+    def post_period(self, start, length=None):
+        data = {"start_date": str(start)}
+        if length:
+            data["end_date"] = str(start + timedelta(days=length - 1))
+        return self.client.post("/api/period-logs/", data, format="json").json()["id"]
+
+    def test_sparse_end_dates(self):
+        # only the first 5 and the last log have an end date
+        starts = [date(2020, 1, 1) + timedelta(days=28 * i) for i in range(17)]
+        for i, start in enumerate(starts):
+            self.post_period(start, 5 if i < 5 else 12 if i == 16 else None)
+        flags = self.assert_matches_rebuild()
+        self.assertIn(("period_length", starts[-1], 12.0), [f[:3] for f in flags])
+
+    def test_creates_and_deletes_match_rebuild(self):
+        start = date(2024, 1, 1)
+        ids = []
+        for i in range(20):
+            length = [5, None, 4, None, 6][i % 5]
+            ids.append(self.post_period(start, length))
+            start += timedelta(days=[28, 29, 27, 45, 28, 100, 28][i % 7])
+        self.client.delete(f"/api/period-logs/{ids[-1]}/")
+        self.client.delete(f"/api/period-logs/{ids[3]}/")  # back-dated
+        self.post_period(start + timedelta(days=60), 11)
+        for i in range(20):
+            severity = [3, 4, 3, 9, 2, 8][i % 6]
+            self.client.post("/api/symptom-logs/", {"date": str(date(2026, 1, 1) + timedelta(days=i)),
+                                                    "symptoms": ["cramps"], "severity": severity}, format="json")
+        self.assertTrue(self.assert_matches_rebuild())
+
+
+# ---------------------------
+# Login / register protection (core/auth_guard.py, core/hashers.py)
+# ---------------------------
+
+FAST_AUTH = dict(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    AUTH_PROTECTION={"workers": 0, "window": 60, "ip_attempts": 5, "username_failures": 3},
+)
+
+
+@override_settings(**FAST_AUTH)
+class LoginThrottleTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user("carol", "carol@example.com", "right-pass-1")
+        self.client = APIClient()
+
+    def login(self, password, username="carol"):
+        return self.client.post("/api/login/", {"username": username, "password": password}, format="json")
+
+    def test_username_locked_after_failures(self):
+        for _ in range(3):
+            self.assertEqual(self.login("wrong").status_code, 400)
+        res = self.login("right-pass-1")
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(res["Retry-After"], "60")
+
+    def test_success_resets_username_failures(self):
+        self.login("wrong")
+        self.login("wrong")
+        self.assertEqual(self.login("right-pass-1").status_code, 200)
+        self.login("wrong")
+        self.assertEqual(self.login("right-pass-1").status_code, 200)
+
+    def test_ip_limit_covers_all_usernames(self):
+        codes = [self.login("x", username=f"user{i}").status_code for i in range(7)]
+        self.assertEqual(codes, [400] * 5 + [429] * 2)
+
+    def test_register_creates_a_usable_account(self):
+        res = self.client.post(
+            "/api/register/", {"username": "dave", "email": "dave@example.com", "password": "dave-pass-1"}, format="json"
+        )
+        self.assertEqual(res.status_code, 201)
+        self.assertIsNotNone(authenticate(username="dave", password="dave-pass-1"))
+
+    def test_register_counts_against_ip(self):
+        for i in range(5):
+            self.client.post("/api/register/", {"username": f"u{i}", "email": f"u{i}@x.com", "password": "p-123456"},
+                             format="json")
+        res = self.client.post("/api/register/", {"username": "u9", "email": "u9@x.com", "password": "p-123456"},
+                               format="json")
+        self.assertEqual(res.status_code, 429)
+
+
+class HashingPoolTests(SimpleTestCase):
+    def setUp(self):
+        auth_guard.reset_pool()
+        self.addCleanup(auth_guard.reset_pool)
+
+    @override_settings(AUTH_PROTECTION={"workers": 1, "max_pending": 0, "timeout": 5})
+    def test_saturated_pool_refuses_immediately(self):
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        result = []
+        t = threading.Thread(target=lambda: result.append(auth_guard.run_hashing(slow)))
+        t.start()
+        started.wait(5)
+        with self.assertRaises(auth_guard.AuthBusy):
+            auth_guard.run_hashing(lambda: "second")
+        release.set()
+        t.join(5)
+        self.assertEqual(result, ["done"])
+        self.assertEqual(auth_guard.run_hashing(lambda: "third"), "third")
+
+
+@override_settings(
+    PASSWORD_HASHERS=["core.hashers.ConfigurablePBKDF2PasswordHasher"],
+    AUTH_PROTECTION={"workers": 0},
+)
+class HasherTests(TestCase):
+    databases = "__all__"
+
+    def test_iterations_have_a_floor(self):
+        with override_settings(PASSWORD_HASH_ITERATIONS=1000):
+            self.assertEqual(get_hasher().iterations, hashers.MIN_ITERATIONS)
+            self.assertEqual([w.id for w in hashers.check_iterations(None)], ["core.W001"])
+
+    def test_changed_iterations_rehash_on_login(self):
+        n = hashers.MIN_ITERATIONS
+        with override_settings(PASSWORD_HASH_ITERATIONS=n):
+            User.objects.create_user("erin", "erin@example.com", "erin-pass-1")
+        with override_settings(PASSWORD_HASH_ITERATIONS=n + 1000):
+            self.assertIsNotNone(authenticate(username="erin", password="erin-pass-1"))
+        self.assertTrue(User.objects.get(username="erin").password.startswith(f"pbkdf2_sha256${n + 1000}$"))
+
+
+# ---------------------------
+# Mood trends (core/mood_trends.py)
+# ---------------------------
+
+class MoodTrendTests(AuthedTestCase):
+    def snapshot(self):
+        return sorted(
+            (g, b, n, total, sorted(counts.items()))
+            for g, b, n, total, counts in MoodTrend.objects.filter(user=self.user)
+            .values_list("granularity", "bucket", "n", "intensity_sum", "counts")
+        )
+
+    def test_incremental_updates_match_full_rebuild(self):
+        today = timezone.localdate()
+        moods = ["happy", "sad", "calm", "tired"]
+        ids = []
+        for i in range(60):
+            res = self.client.post("/api/mood-logs/", {
+                "date": str(today - timedelta(days=i)), "mood": moods[i % 4], "intensity": i % 10 + 1,
+            }, format="json")
+            ids.append(res.json()["id"])
+        periods = []
+        for k in range(3):
+            start = today - timedelta(days=28 * k + 3)
+            res = self.client.post("/api/period-logs/", {"start_date": str(start)}, format="json")
+            periods.append(res.json()["id"])
+        self.client.put(f"/api/mood-logs/{ids[5]}/", {"mood": "calm", "intensity": 2}, format="json")
+        self.client.put(f"/api/mood-logs/{ids[6]}/", {"date": str(today - timedelta(days=200))}, format="json")
+        self.client.delete(f"/api/mood-logs/{ids[7]}/")
+        self.client.delete(f"/api/period-logs/{periods[1]}/")
+        self.client.post("/api/period-logs/", {"start_date": str(today - timedelta(days=45))}, format="json")
+
+        incremental = self.snapshot()
+        mood_trends.rebuild_user(self.user)
+        self.assertEqual(incremental, self.snapshot())
+
+    def test_period_change_only_reads_the_affected_cycle(self):
+        today = timezone.localdate()
+        for i in range(90):
+            self.client.post("/api/mood-logs/", {"date": str(today - timedelta(days=i)), "mood": "calm"}, format="json")
+        start = today - timedelta(days=10)
+        self.client.post("/api/period-logs/", {"start_date": str(today - timedelta(days=40))}, format="json")
+        self.client.post("/api/period-logs/", {"start_date": str(start)}, format="json")
+        with capture_queries() as q:
+            mood_trends.on_period_start_changed(self.user, start, added=True)
+        mood_sql = [x["sql"] for x in q.captured_queries if "core_moodlog" in x["sql"]]
+        self.assertEqual(len(mood_sql), 1)
+        self.assertIn(str(start), mood_sql[0])
+
+    def test_trends_endpoint_shapes(self):
+        self.client.post("/api/mood-logs/", {"date": str(timezone.localdate()), "mood": "happy", "intensity": 8},
+                         format="json")
+        data = self.client.get("/api/mood-trends/", {"days": 7}).json()
+        self.assertEqual(len(data["daily"]["dates"]), 7)
+        self.assertEqual(len(data["daily"]["rolling_30"]), 7)
+        self.assertEqual(data["daily"]["intensity"][-1], 8)
+        self.assertEqual(self.client.get("/api/mood-trends/", {"days": 0}).status_code, 400)
+
+
+# ---------------------------
+# Prompt budgets (core/prompts.py)
+# ---------------------------
+
+class PromptBudgetTests(SimpleTestCase):
+    def budget(self, tokens):
+        return override_settings(LLM={**settings.LLM, "budgets": {"chatbot": tokens}})
+
+    def sections(self):
+        return [
+            prompts.Section("profile", "P" * 200, 0),
+            prompts.Section("averages", "A" * 200, 1),
+            prompts.Section("flags", "F" * 200, 2),
+            prompts.Section("recent_notes", "N" * 200, 3),
+        ]
+
+    def test_under_budget_keeps_everything(self):
+        p = prompts.render("chatbot", self.sections(), question="hi")
+        self.assertEqual(p.dropped, [])
+        self.assertIn("N" * 200, p.user)
+
+    def test_drops_lowest_priority_first(self):
+        base = prompts.render("chatbot", [], question="hi").tokens
+        with self.budget(base + 105):
+            p = prompts.render("chatbot", self.sections(), question="hi")
+        self.assertEqual(p.dropped, ["recent_notes", "flags"])
+        self.assertIn("A" * 200, p.user)
+        self.assertLessEqual(p.tokens, base + 105)
+
+    def test_priority_zero_is_never_dropped(self):
+        with self.budget(1), self.assertLogs("core.prompts", "WARNING") as logs:
+            p = prompts.render("chatbot", self.sections(), question="hi")
+        self.assertEqual(p.dropped, ["recent_notes", "flags", "averages"])
+        self.assertIn("chatbot prompt over budget", logs.output[0])
+        self.assertIn("P" * 200, p.user)
+
+    def test_data_rule_only_on_insights(self):
+        rule = "do not invent data"
+        self.assertIn(rule, prompts.REGISTRY["insights"].system)
+        for endpoint in ["chatbot", "mood_tip", "symptom_tip"]:
+            self.assertNotIn(rule, prompts.REGISTRY[endpoint].system, endpoint)
+
+
+class TrimmedSectionsLogTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        llm.reset_provider()
+        self.addCleanup(llm.reset_provider)
+
+    def test_trimmed_sections_are_logged(self):
+        self.client.post("/api/period-logs/", {"start_date": "2026-01-01"}, format="json")
+        with override_settings(LLM={**settings.LLM, "provider": "local", "budgets": {"chatbot": 1}}), \
+                self.assertLogs("core.prompts", "WARNING") as logs:
+            res = self.client.post("/api/chatbot/", {"prompt": "Can stress change my mood?"}, format="json")
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("over budget", logs.output[0])
+        log = AICallLog.objects.get(endpoint="chatbot")
+        self.assertEqual(log.trimmed_sections, "recent_notes,last_period,averages")
+
+
+# ---------------------------
+# ML artifact loading (core/ml.py)
+# ---------------------------
+
+def temp_model_dir(test):
+    """
+    Points ML_MODEL_DIR at an empty temp dir for one test.
+    """
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    patcher = override_settings(ML_MODEL_DIR=Path(tmp.name))
+    patcher.enable()
+    test.addCleanup(patcher.disable)
+    ml.reset_model()
+    test.addCleanup(ml.reset_model)
+    return Path(tmp.name)
+
+
+class GetModelTests(SimpleTestCase):
+    def setUp(self):
+        self.dir = temp_model_dir(self)
+
+    def write_meta(self, version, mtime):
+        meta = self.dir / "meta.json"
+        meta.write_text(f'{{"version": {version}}}')
+        os.utime(meta, (mtime, mtime))
+
+    def test_version_mismatch_is_cached_until_meta_changes(self):
+        self.write_meta(ml.MODEL_VERSION + 1, 1_000_000)
+        loaded = mock.Mock(meta={"version": ml.MODEL_VERSION + 1})
+        with mock.patch.object(ml, "CycleModel", return_value=loaded) as load:
+            self.assertIsNone(ml.get_model())
+            self.assertIsNone(ml.get_model())
+            self.assertEqual(load.call_count, 1)
+
+            loaded.meta = {"version": ml.MODEL_VERSION}
+            self.write_meta(ml.MODEL_VERSION, 2_000_000)
+            self.assertIs(ml.get_model(), loaded)
+            self.assertEqual(load.call_count, 2)
+
+    def test_missing_artifact_is_picked_up_once_written(self):
+        self.assertIsNone(ml.get_model())
+        loaded = mock.Mock(meta={"version": ml.MODEL_VERSION})
+        with mock.patch.object(ml, "CycleModel", return_value=loaded):
+            self.write_meta(ml.MODEL_VERSION, 1_000_000)
+            self.assertIs(ml.get_model(), loaded)
+
+
+class MLPipelineTests(AuthedTestCase):
+    """
+    train() + predict_all_users on synthetic users with regular 27-29 day
+    cycles, cramps on cycle days 1-2 and "tired" moods on day 1.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.dir = temp_model_dir(self)
+        # worker threads can't read the in-memory shard DBs inside the test transaction
+        patcher = mock.patch.object(ml, "fan_out", lambda fn: [fn(alias) for alias in all_shards()])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.today = timezone.localdate()
+        self.users = [self.user] + [
+            User.objects.create(username=f"user{i}") for i in range(3)
+        ]
+        for user in self.users:
+            start = self.today - timedelta(days=1)  # everyone is on cycle day 2
+            starts = []
+            for k in range(8):
+                starts.append(start)
+                start -= timedelta(days=[28, 27, 29][k % 3])
+            PeriodLog.objects.on_shard_of(user).bulk_create(
+                [PeriodLog(user=user, start_date=s) for s in starts]
+            )
+            SymptomLog.objects.on_shard_of(user).bulk_create(
+                [SymptomLog(user=user, date=s + timedelta(days=d), symptoms=["cramps"], severity=6)
+                 for s in starts for d in (0, 1)]
+            )
+            MoodLog.objects.on_shard_of(user).bulk_create(
+                [MoodLog(user=user, date=s, mood="tired") for s in starts]
+            )
+        # rows of a deleted user: not cascaded on shard databases
+        PeriodLog.objects.using(all_shards()[0]).create(user_id=999_999, start_date=self.today)
+
+    def train(self):
+        arrays, meta = ml.train()
+        ml.save(arrays, meta)
+        ml.reset_model()
+        return meta
+
+    def test_train_and_serve(self):
+        meta = self.train()
+        self.assertEqual(meta["cycle_samples"], 4 * 6)
+        model = ml.get_model()
+        self.assertAlmostEqual(model.predict_cycle_length([28, 27, 29, 28]), 28, delta=1)
+        self.assertEqual(model.predict_symptoms(1)[0]["symptom"], "cramps")
+        self.assertEqual(model.predict_mood(1)["mood"], "tired")
+
+    def test_days_without_samples_predict_nothing(self):
+        self.train()
+        model = ml.get_model()
+        for day in (20, 60):
+            self.assertIsNone(model.predict_symptoms(day))
+            self.assertIsNone(model.predict_mood(day))
+
+    def test_batch_scoring_skips_orphans_and_is_served(self):
+        self.train()
+        call_command("predict_all_users", stdout=mock.MagicMock())
+        preds = {p.user_id: p for p in UserPrediction.objects.all()}
+        self.assertEqual(set(preds), {u.id for u in self.users})
+        pred = preds[self.user.id]
+        self.assertEqual(pred.last_start, self.today - timedelta(days=1))
+        self.assertEqual(pred.likely_symptoms[0]["symptom"], "cramps")
+        self.assertEqual(pred.likely_mood, "")  # day 2 has no mood samples
+
+        # without an artifact the dashboard still serves the fresh batch row
+        temp_model_dir(self)
+        data = self.client.get("/api/dashboard/").json()
+        self.assertEqual(data["ml"]["cycle_length"], pred.cycle_length)
+        self.assertEqual(data["ml"]["likely_symptoms"], pred.likely_symptoms)
+        self.assertIsNone(data["ml"]["likely_mood"])
+
+    def test_stale_batch_row_is_ignored(self):
+        self.train()
+        call_command("predict_all_users", stdout=mock.MagicMock())
+        self.client.post("/api/period-logs/", {"start_date": str(self.today)}, format="json")
+        temp_model_dir(self)
+        self.assertIsNone(self.client.get("/api/dashboard/").json()["ml"])
+
+
+# ---------------------------
+# Sharding (core/sharding.py, rebalance_shards)
+# ---------------------------
+
+EXTRA_SHARD = "shard_test"
+
+
+class ShardTests(TestCase):
+    """
+    Runs on the configured shards when SHARD_COUNT >= 2; otherwise adds an
+    in-memory SQLite shard next to "default" for the duration of the class.
+    """
+
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        cls.shards = all_shards()
+        if len(cls.shards) == 1:
+            connections.settings[EXTRA_SHARD] = connections.configure_settings({
+                "default": connections.settings["default"],
+                EXTRA_SHARD: {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+            })[EXTRA_SHARD]
+            cls.addClassCleanup(cls._drop_extra_shard)
+            cls.shards = ["default", EXTRA_SHARD]
+            cls.enterClassContext(override_settings(USER_SHARDS=cls.shards))
+            call_command("migrate", database=EXTRA_SHARD, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def _drop_extra_shard(cls):
+        connections[EXTRA_SHARD].close()
+        del connections[EXTRA_SHARD]
+        del connections.settings[EXTRA_SHARD]
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("alice", "alice@example.com", "pw")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for start in ["2026-01-01", "2026-01-29"]:
+            self.client.post("/api/period-logs/", {"start_date": start}, format="json")
+        old = timezone.now() - timedelta(days=30)
+        ChatMessage.objects.create(user=self.user, role="user", content="hi")
+        ChatMessage.objects.for_user(self.user).update(created_at=old)
+        self.old = old
+
+    def rows(self, model, alias):
+        return model.objects.using(alias).filter(user=self.user).count()
+
+    def other(self, alias):
+        return next(a for a in self.shards if a != alias)
+
+    def test_rows_are_routed_to_the_pinned_shard(self):
+        home = shard_for(self.user.id)
+        self.assertEqual(ShardAssignment.objects.get(user=self.user).alias, home)
+        self.assertEqual(self.rows(PeriodLog, home), 2)
+        self.assertEqual(self.rows(PeriodLog, self.other(home)), 0)
+        self.assertEqual(len(self.client.get("/api/period-logs/").json()), 2)
+
+    def test_move_copies_rows_and_keeps_created_at(self):
+        source = shard_for(self.user.id)
+        target = self.other(source)
+        self.assertEqual(move_user(self.user.id, target), 3)
+        self.assertEqual(shard_for(self.user.id), target)
+        self.assertEqual(self.rows(PeriodLog, source), 0)
+        self.assertEqual(self.rows(PeriodLog, target), 2)
+        self.assertEqual(ChatMessage.objects.for_user(self.user).get().created_at, self.old)
+
+    def test_interrupted_copy_is_redone_without_duplicates(self):
+        source = shard_for(self.user.id)
+        target = self.other(source)
+        PeriodLog.objects.using(target).create(user=self.user, start_date="2026-01-01")  # partial copy
+        move_user(self.user.id, target)
+        self.assertEqual(self.rows(PeriodLog, target), 2)
+        self.assertEqual(self.rows(PeriodLog, source), 0)
+
+    def test_rerun_after_switch_finishes_cleanup(self):
+        source = shard_for(self.user.id)
+        target = self.other(source)
+        # the copy phase clears the target once per model; die on the first source delete
+        with mock.patch("core.management.commands.rebalance_shards.delete_in_batches",
+                        side_effect=[0] * 4 + [RuntimeError("killed")]):
+            with self.assertRaises(RuntimeError):
+                move_user(self.user.id, target)
+        self.assertEqual(shard_for(self.user.id), target)
+        self.assertEqual(self.rows(PeriodLog, source), 2)
+
+        call_command("rebalance_shards", user="alice", to=target, stdout=mock.MagicMock())
+        self.assertEqual(self.rows(PeriodLog, source), 0)
+        self.assertEqual(self.rows(PeriodLog, target), 2)
+
+
+# ---------------------------
+# Chat retention (core/chat_retention.py)
+# ---------------------------
+
+class ChatRetentionTests(AuthedTestCase):
+    def setUp(self):
+        super().setUp()
+        ChatMessage.objects.on_shard_of(self.user).bulk_create(
+            [ChatMessage(user=self.user, role="user", content=f"m{i}") for i in range(25)]
+        )
+
+    def test_archive_in_batches_keeps_the_newest(self):
+        n = chat_retention.compact_user(self.user, max_messages=5, size=8)
+        self.assertEqual(n, 20)
+        self.assertEqual(
+            list(ChatArchive.objects.filter(user=self.user).order_by("id").values_list("message_count", flat=True)),
+            [8, 8, 4],
+        )
+        kept = ChatMessage.objects.for_user(self.user).order_by("id").values_list("content", flat=True)
+        self.assertEqual(list(kept), [f"m{i}" for i in range(20, 25)])
+        first = chat_retention.unpack(ChatArchive.objects.filter(user=self.user).order_by("id").first())
+        self.assertEqual(first[0]["content"], "m0")
+
+    def test_delete_in_batches_uses_bounded_statements(self):
+        qs = ChatMessage.objects.for_user(self.user)
+        with capture_queries() as q:
+            self.assertEqual(chat_retention.delete_in_batches(qs, size=10), 25)
+        deletes = [x for x in q.captured_queries if x["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(qs.exists())
@@ -0,0 +1,132 @@
+# core/timeline.py
+# Dense per-day calendar timeline for a date window.
+# Period / mood / symptom rows are fetched with (user, date) range scans
+# and merged in one pass, so cost follows the window size, not the history.
+
+from datetime import date, timedelta
+
+from . import cycle
+from .models import PeriodLog, MoodLog, SymptomLog
+
+MAX_WINDOW_DAYS = 366
+
+# Accepted window bounds; keeps date arithmetic far from date.min / date.max.
+MIN_DATE = date(1900, 1, 1)
+MAX_DATE = date(2200, 12, 31)
+
+# Periods that started this long before the window can still overlap it.
+# A logged period longer than this that starts before the window is not
+# shown in it (it is only looked up by start_date, to keep this an index range).
+MAX_PERIOD_DAYS = 15
+
+
+def _predicted_days(pred, period_len, start, end):
+    """
+    Predicted periods / fertile windows / ovulation days inside [start, end],
+    projected from the last logged start. Returns three sets of dates.
+    Jumps straight to the first cycle that can reach the window, so the cost
+    depends on the window size only.
+    """
+    predicted, fertile, ovulation = set(), set(), set()
+    if not pred:
+        return predicted, fertile, ovulation
+
+    cycle_len = max(1, round(pred["avg_cycle"]))
+    step = timedelta(days=cycle_len)
+    ov_offset = pred["ovulation"] - pred["last_start"]
+    last_start = pred["last_start"]
+
+    # a cycle touches days up to max(period end, ovulation + 1) after its start
+    reach = max(cycle_len, period_len, ov_offset.days + 2)
+    behind = (start - last_start).days - reach
+    k = max(0, -(-behind // cycle_len))
+    cycle_start = last_start + k * step
+
+    def add(target, d):
+        if start <= d <= end:
+            target.add(d)
+
+    while cycle_start <= end:
+        if k > 0:
+            for i in range(period_len):
+                add(predicted, cycle_start + timedelta(days=i))
+        ov = cycle_start + ov_offset
+        add(ovulation, ov)
+        for i in range(-5, 2):
+            add(fertile, ov + timedelta(days=i))
+        cycle_start += step
+        k += 1
+
+    return predicted, fertile, ovulation
+
+
+def build_timeline(user, start, end, today):
+    """
+    One entry per day in [start, end].
+    """
+    periods = list(
+        PeriodLog.objects.for_user(user).filter(
+            start_date__range=(start - timedelta(days=MAX_PERIOD_DAYS), end),
+        )
+        .order_by("start_date")
+        .values_list("start_date", "end_date", "flow_level")
+    )
+
+    # Bounded history for predictions (index scan on user, -start_date)
+    recent = list(
+        PeriodLog.objects.for_user(user)
+        .order_by("-start_date")
+        .values_list("start_date", "end_date", "cycle_length")[:cycle.PREDICTION_HISTORY]
+    )[::-1]
+    pred = cycle.predict([r[0] for r in recent], [r[2] for r in recent], today)
+    period_len = cycle.average_period_length([(r[0], r[1]) for r in recent])
+    predicted, fertile, ovulation = _predicted_days(pred, period_len, start, end)
+
+    moods = iter(
+        MoodLog.objects.for_user(user).filter(date__range=(start, end))
+        .order_by("date")
+        .values_list("date", "mood", "intensity")
+    )
+    symptoms = iter(
+        SymptomLog.objects.for_user(user).filter(date__range=(start, end))
+        .order_by("date")
+        .values_list("date", "severity")
+    )
+
+    flow_by_day = {}
+    for s, e, flow in periods:
+        last = e or s
+        d = max(s, start)
+        while d <= min(last, end):
+            flow_by_day[d] = flow
+            d += timedelta(days=1)
+
+    next_mood = next(moods, None)
+    next_sym = next(symptoms, None)
+
+    days = []
+    d = start
+    while d <= end:
+        mood = intensity = severity = None
+        if next_mood and next_mood[0] == d:
+            _, mood, intensity = next_mood
+            next_mood = next(moods, None)
+        if next_sym and next_sym[0] == d:
+            severity = next_sym[1]
+            next_sym = next(symptoms, None)
+
+        is_period = d in flow_by_day
+        days.append({
+            "date": d.isoformat(),
+            "period": is_period,
+            "flow": flow_by_day.get(d) or None,
+            "predicted_period": d in predicted and not is_period,
+            "fertile": d in fertile,
+            "ovulation": d in ovulation,
+            "mood": mood,
+            "mood_intensity": intensity,
+            "symptom_severity": severity,
+        })
+        d += timedelta(days=1)
+
+    return days
@@ -0,0 +1,257 @@
+# core/tokens.py
+# Expiring API tokens ("Authorization: Token <key>", same header as before).
+#
+# - Sliding expiry: each use pushes expires_at to now + ttl, capped at
+#   created + max_age. Expired rows are removed by `manage.py purge_tokens`.
+# - Lookups go through the cache: a hit authenticates with zero queries,
+#   unknown/expired keys are negatively cached for a short time.
+# - last_used / expires_at are written at most every touch_interval per
+#   token, batched in a background flush (the request never waits on it).
+# - The token entry holds only user_id + timestamps; the User is cached
+#   separately and dropped whenever it is saved, so is_active / is_staff
+#   changes apply on the next request. A password change, deactivation or
+#   deletion revokes all of the user's tokens (connect_signals()).
+# - revoke()/revoke_user() delete the rows and overwrite the cache entries,
+#   so they take effect immediately in this process. Other processes notice
+#   after cache_seconds unless CACHES is shared (set REDIS_URL).
+#
+# Configured by settings.AUTH_TOKENS.
+
+import atexit
+import logging
+import secrets
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections
+from django.db.models.signals import post_save, pre_delete
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import AuthToken
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ttl_days": 30,
+    "max_age_days": 90,
+    "cache_seconds": 30,
+    "negative_cache_seconds": 30,
+    "touch_interval": 300,
+    "flush_interval": 5.0,
+}
+
+_INVALID = "invalid"
+
+
+def _setting(name):
+    return getattr(settings, "AUTH_TOKENS", {}).get(name, DEFAULTS[name])
+
+
+def _cache_key(key):
+    return f"token:{key}"
+
+
+def _user_cache_key(user_id):
+    return f"token_user:{user_id}"
+
+
+def _expiry(now, created_at):
+    return min(now + timedelta(days=_setting("ttl_days")),
+               created_at + timedelta(days=_setting("max_age_days")))
+
+
+def issue_token(user) -> AuthToken:
+    now = timezone.now()
+    return AuthToken.objects.create(
+        key=secrets.token_hex(20), user=user,
+        created_at=now, last_used=now, expires_at=_expiry(now, now),
+    )
+
+
+def revoke(key):
+    AuthToken.objects.filter(key=key).delete()
+    cache.set(_cache_key(key), _INVALID, _setting("negative_cache_seconds"))
+
+
+def revoke_user(user):
+    """
+    Signs the user out everywhere (e.g. after a password change or deactivation).
+    """
+    keys = list(AuthToken.objects.filter(user=user).values_list("key", flat=True))
+    AuthToken.objects.filter(key__in=keys).delete()
+    cache.set_many({_cache_key(k): _INVALID for k in keys}, _setting("negative_cache_seconds"))
+
+
+# ---------------------------
+# Batched last_used updates
+# ---------------------------
+
+class TouchBuffer:
+    """
+    Latest (last_used, expires_at) per token key, flushed by a timer thread.
+    """
+
+    def __init__(self, flush_interval=5.0):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, key, last_used, expires_at):
+        with self._lock:
+            self._pending[key] = (last_used, expires_at)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+        rows = [AuthToken(key=k, last_used=used, expires_at=exp) for k, (used, exp) in batch.items()]
+        try:
+            # rows revoked in the meantime simply match nothing
+            AuthToken.objects.bulk_update(rows, ["last_used", "expires_at"], batch_size=500)
+        except Exception:
+            logger.exception("Token last_used flush failed (%d tokens)", len(rows))
+            return 0
+        return len(rows)
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()  # timer thread owns its own DB connections
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer() -> TouchBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = TouchBuffer(flush_interval=_setting("flush_interval"))
+                atexit.register(_buffer.flush)
+    return _buffer
+
+
+def flush_pending():
+    if _buffer is not None:
+        _buffer.flush()
+
+
+# ---------------------------
+# Lookup
+# ---------------------------
+
+def _load(key):
+    """
+    (entry, user) for a valid token, or None. One query.
+    """
+    token = AuthToken.objects.select_related("user").filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    cache.set(_user_cache_key(token.user_id), token.user, _setting("cache_seconds"))
+    entry = {
+        "user_id": token.user_id,
+        "created_at": token.created_at,
+        "last_used": token.last_used,
+        "expires_at": token.expires_at,
+    }
+    return entry, token.user
+
+
+def _user(user_id):
+    user = cache.get(_user_cache_key(user_id))
+    if user is None:
+        user = User.objects.filter(pk=user_id, is_active=True).first()
+        if user is not None:
+            cache.set(_user_cache_key(user_id), user, _setting("cache_seconds"))
+    return user
+
+
+def lookup(key):
+    """
+    Returns the token's user, or None if the key is unknown, revoked or expired.
+    """
+    ck = _cache_key(key)
+    entry = cache.get(ck)
+    if entry == _INVALID:
+        return None
+
+    loaded = entry is None
+    if loaded:
+        found = _load(key)
+        if found is None:
+            cache.set(ck, _INVALID, _setting("negative_cache_seconds"))
+            return None
+        entry, user = found
+    else:
+        user = _user(entry["user_id"])
+        if user is None:
+            cache.set(ck, _INVALID, _setting("negative_cache_seconds"))
+            return None
+
+    now = timezone.now()
+    if now >= entry["expires_at"]:
+        cache.set(ck, _INVALID, _setting("negative_cache_seconds"))
+        return None
+
+    touched = (now - entry["last_used"]).total_seconds() >= _setting("touch_interval")
+    if touched:
+        entry = {**entry, "last_used": now, "expires_at": _expiry(now, entry["created_at"])}
+        get_buffer().add(key, now, entry["expires_at"])
+    if touched or loaded:
+        cache.set(ck, entry, _setting("cache_seconds"))
+    return user
+
+
+# ---------------------------
+# Revocation on account changes
+# ---------------------------
+
+def _user_saved(sender, instance, created, **kwargs):
+    cache.delete(_user_cache_key(instance.pk))
+    if created:
+        return
+    # _password is only set by set_password(), not by hash upgrades on login
+    if instance._password is not None or not instance.is_active:
+        revoke_user(instance)
+
+
+def _user_deleted(sender, instance, **kwargs):
+    cache.delete(_user_cache_key(instance.pk))
+    revoke_user(instance)
+
+
+def connect_signals():
+    """
+    Called from CoreConfig.ready().
+    """
+    post_save.connect(_user_saved, sender=User, dispatch_uid="core.tokens.user_saved")
+    pre_delete.connect(_user_deleted, sender=User, dispatch_uid="core.tokens.user_deleted")
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in for DRF's TokenAuthentication backed by AuthToken + the cache.
+    """
+
+    def authenticate_credentials(self, key):
+        user = lookup(key)
+        if user is None:
+            raise AuthenticationFailed("Invalid or expired token.")
+        return (user, key)
@@ -1,63 +1,47 @@
 # core/views.py  ✅ Clean + complete Gemini version
 
-import os
-from datetime import date
+from datetime import date, timedelta
 
+from django.conf import settings
 from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.utils import timezone
 
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from rest_framework.authtoken.models import Token
-
-# ✅ Gemini SDK
-from google import genai
 
+from . import anomalies, auth_guard, cycle, ml, mood_trends
+from .ai_log import summarize as summarize_ai_calls
+from .chat_retention import clear_user
+from .chat_store import flush_pending, save_exchange
+from .intents import fast_answer, fast_path_metrics
+from .llm import llm_text
+from .prompts import Section, render as render_prompt
+from .timeline import (
+    build_timeline,
+    MAX_WINDOW_DAYS,
+    MAX_DATE as TIMELINE_MAX_DATE,
+    MIN_DATE as TIMELINE_MIN_DATE,
+)
+from .tokens import issue_token, revoke
 from .models import PeriodLog, UserProfile, ChatMessage, MoodLog, SymptomLog
+from .renderers import ORJSONRenderer
 from .serializers import (
     PeriodLogSerializer,
     UserProfileSerializer,
     MoodLogSerializer,
     SymptomLogSerializer,
+    PERIOD_LOG_FIELDS,
+    MOOD_LOG_FIELDS,
+    SYMPTOM_LOG_FIELDS,
+    fast_list,
 )
 
-# ---------------------------
-# Gemini helpers
-# ---------------------------
-
-GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-
-
-def _get_gemini_client():
-    """
-    Reads GEMINI_API_KEY from environment variables.
-    """
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
-        return None
-    return genai.Client(api_key=api_key)
-
-
-def gemini_text(system_text: str, user_text: str, model: str = GEMINI_MODEL):
-    """
-    Returns (text, error_string_or_None)
-    """
-    client = _get_gemini_client()
-    if client is None:
-        return None, "GEMINI_API_KEY is not set on the server."
-
-    prompt = f"{system_text}\n\nUSER:\n{user_text}"
-
-    try:
-        resp = client.models.generate_content(model=model, contents=prompt)
-        text = (getattr(resp, "text", "") or "").strip()
-        return text, None
-    except Exception as e:
-        return None, str(e)
-
-
 # ---------------------------
 # Personalization helpers
 # ---------------------------
@@ -77,23 +61,21 @@ def _safe_avg(nums):
     return round(sum(nums) / len(nums), 1)
 
 
-def build_user_context(user) -> str:
+def build_user_context(user):
     """
-    Small, safe summary from recent logs + profile settings.
+    Small, safe summary from recent logs + profile settings, as prompt Sections.
     Used ONLY for personalization (not diagnosis).
+    Priority: 0 = always kept, higher = trimmed first when over budget.
     """
-    logs = list(PeriodLog.objects.filter(user=user).order_by("-start_date")[:10])
+    logs = list(PeriodLog.objects.for_user(user).order_by("-start_date")[:10])
 
     prof = getattr(user, "profile", None)
     nickname = prof.nickname if prof and prof.nickname else user.username
     tone = prof.tone if prof else "friendly"
+    profile_section = Section("profile", f"User nickname: {nickname}\nPreferred tone: {tone}\n", 0)
 
     if not logs:
-        return (
-            f"User nickname: {nickname}\n"
-            f"Preferred tone: {tone}\n"
-            f"No period logs yet.\n"
-        )
+        return [profile_section, Section("no_logs", "No period logs yet.\n", 0)]
 
     logs_sorted = sorted(logs, key=lambda x: x.start_date)
 
@@ -127,20 +109,33 @@ def build_user_context(user) -> str:
             recent_text.append(f"symptoms: {l.symptoms}")
     recent_summary = "; ".join(recent_text) if recent_text else "No recent notes."
 
-    return (
-        f"User nickname: {nickname}\n"
-        f"Preferred tone: {tone}\n"
-        f"Average cycle length: {avg_cycle if avg_cycle is not None else 'unknown'} days\n"
-        f"Average period length: {avg_period if avg_period is not None else 'unknown'} days\n"
-        f"Last period: {last_start} to {last_end}\n"
-        f"Recent notes: {recent_summary}\n"
-    )
+    return [
+        profile_section,
+        Section("averages", (
+            f"Average cycle length: {avg_cycle if avg_cycle is not None else 'unknown'} days\n"
+            f"Average period length: {avg_period if avg_period is not None else 'unknown'} days\n"
+        ), 1),
+        Section("last_period", f"Last period: {last_start} to {last_end}\n", 1),
+        Section("recent_notes", f"Recent notes: {recent_summary}\n", 3),
+    ]
 
 
 # ---------------------------
 # AUTH
 # ---------------------------
 
+def _auth_throttled(wait):
+    return Response(
+        {"error": "Too many attempts. Please try again later."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(wait)},
+    )
+
+
+def _auth_busy(e):
+    return Response({"error": str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={"Retry-After": "1"})
+
+
 @api_view(["POST"])
 @permission_classes([AllowAny])
 def register_user(request):
@@ -154,13 +149,30 @@ def register_user(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    wait = auth_guard.throttled(auth_guard.client_ip(request))
+    if wait:
+        return _auth_throttled(wait)
+
     if User.objects.filter(username=username).exists():
         return Response({"error": "Username already exists"}, status=status.HTTP_400_BAD_REQUEST)
 
     if User.objects.filter(email=email).exists():
         return Response({"error": "Email already exists"}, status=status.HTTP_400_BAD_REQUEST)
 
-    User.objects.create_user(username=username, email=email, password=password)
+    # Only the hash runs on the pool; the row is written here, so a timed-out
+    # request creates nothing and the client can simply retry.
+    try:
+        hashed = auth_guard.run_hashing(make_password, password)
+    except auth_guard.AuthBusy as e:
+        return _auth_busy(e)
+    try:
+        User.objects.create(
+            username=User.normalize_username(username),
+            email=User.objects.normalize_email(email),
+            password=hashed,
+        )
+    except IntegrityError:
+        return Response({"error": "Username already exists"}, status=status.HTTP_400_BAD_REQUEST)
     return Response({"message": "User registered successfully"}, status=status.HTTP_201_CREATED)
 
 
@@ -176,12 +188,31 @@ def login_user(request):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
-    user = authenticate(username=username, password=password)
+    wait = auth_guard.throttled(auth_guard.client_ip(request), username)
+    if wait:
+        return _auth_throttled(wait)
+
+    try:
+        user = auth_guard.run_hashing(authenticate, username=username, password=password)
+    except auth_guard.AuthBusy as e:
+        return _auth_busy(e)
     if user is None:
+        auth_guard.record_failure(username)
         return Response({"error": "Invalid username or password"}, status=status.HTTP_400_BAD_REQUEST)
+    auth_guard.record_success(username)
 
-    token, _ = Token.objects.get_or_create(user=user)
-    return Response({"token": token.key, "username": user.username}, status=status.HTTP_200_OK)
+    token = issue_token(user)
+    return Response(
+        {"token": token.key, "username": user.username, "expires_at": token.expires_at},
+        status=status.HTTP_200_OK,
+    )
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def logout_user(request):
+    revoke(request.auth)
+    return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
 
 
 # ---------------------------
@@ -199,6 +230,7 @@ def profile(request):
     ser = UserProfileSerializer(prof, data=request.data, partial=True)
     if ser.is_valid():
         ser.save()
+        invalidate_dashboard(request.user.id)
         return Response(ser.data, status=status.HTTP_200_OK)
 
     return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -210,14 +242,20 @@ def profile(request):
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer])
 def period_logs(request):
     if request.method == "GET":
-        logs = PeriodLog.objects.filter(user=request.user).order_by("-start_date")
-        return Response(PeriodLogSerializer(logs, many=True).data, status=status.HTTP_200_OK)
+        # ?layout=columns -> parallel arrays for calendar / chart views
+        logs = PeriodLog.objects.for_user(request.user).order_by("-start_date")
+        data = fast_list(logs, PERIOD_LOG_FIELDS, request.query_params.get("layout", "rows"))
+        return Response(data, status=status.HTTP_200_OK)
 
     ser = PeriodLogSerializer(data=request.data)
     if ser.is_valid():
-        ser.save(user=request.user)
+        log = ser.save(user=request.user)
+        invalidate_dashboard(request.user.id)
+        anomalies.on_period_log_changed(request.user, log.start_date)
+        mood_trends.on_period_start_changed(request.user, log.start_date, added=True)
         return Response(ser.data, status=status.HTTP_201_CREATED)
 
     return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -227,14 +265,168 @@ def period_logs(request):
 @permission_classes([IsAuthenticated])
 def delete_period_log(request, pk):
     try:
-        log = PeriodLog.objects.get(pk=pk, user=request.user)
+        log = PeriodLog.objects.for_user(request.user).get(pk=pk)
     except PeriodLog.DoesNotExist:
         return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
 
     log.delete()
+    invalidate_dashboard(request.user.id)
+    anomalies.on_period_log_changed(request.user, log.start_date)
+    mood_trends.on_period_start_changed(request.user, log.start_date, added=False)
     return Response({"message": "Deleted"}, status=status.HTTP_200_OK)
 
 
+# ---------------------------
+# DASHBOARD (single round-trip for the home screen)
+# ---------------------------
+
+DASHBOARD_RECENT_LOGS = 3
+
+
+def _dashboard_cache_key(user_id) -> str:
+    return f"dashboard:{user_id}"
+
+
+def invalidate_dashboard(user_id):
+    cache.delete(_dashboard_cache_key(user_id))
+
+
+def _date_str(d):
+    return d.isoformat() if d else None
+
+
+def build_dashboard(user) -> dict:
+    """
+    Everything dashboard.js needs, in 4 bounded queries: user + profile +
+    batch prediction, the latest PREDICTION_HISTORY period logs (narrow
+    columns), today's mood, today's symptoms. A COUNT is added only when
+    the user has more logs than that.
+    """
+    today = timezone.localdate()
+
+    # profile and the batch ML prediction ride along with the user row
+    account = User.objects.select_related("profile", "prediction").get(pk=user.pk)
+    prof = getattr(account, "profile", None)
+
+    period_logs = PeriodLog.objects.for_user(user)
+    logs = list(
+        period_logs.order_by("-start_date")
+        .values("id", "start_date", "end_date", "cycle_length", "flow_level", "mood")[:cycle.PREDICTION_HISTORY]
+    )
+    log_count = period_logs.count() if len(logs) == cycle.PREDICTION_HISTORY else len(logs)
+    history = logs[::-1]
+    starts = [l["start_date"] for l in history]
+    manual = [l["cycle_length"] for l in history]
+    pred = cycle.predict(starts, manual, today)
+    ml_pred = (
+        ml.stored_prediction(getattr(account, "prediction", None), starts, today)
+        or ml.predict_for_starts(ml.get_model(), starts, today)
+    )
+
+    mood = (
+        MoodLog.objects.for_user(user).filter(date=today)
+        .values("id", "mood", "intensity", "note")
+        .first()
+    )
+    symptoms = (
+        SymptomLog.objects.for_user(user).filter(date=today)
+        .values("id", "symptoms", "severity", "note")
+        .first()
+    )
+
+    if pred:
+        pred = {k: (_date_str(v) if isinstance(v, date) else v) for k, v in pred.items()}
+
+    recent = [
+        {
+            "id": l["id"],
+            "start_date": _date_str(l["start_date"]),
+            "end_date": _date_str(l["end_date"]),
+            "cycle_length": l["cycle_length"],
+            "flow_level": l["flow_level"],
+            "mood": l["mood"],
+        }
+        for l in logs[:DASHBOARD_RECENT_LOGS]
+    ]
+
+    return {
+        "today": _date_str(today),
+        "profile": {
+            "username": user.username,
+            "nickname": prof.nickname if prof else "",
+            "tone": prof.tone if prof else "friendly",
+        },
+        "cycle": pred,
+        "ml": ml_pred,
+        "today_mood": mood,
+        "today_symptoms": symptoms,
+        "recent_logs": recent,
+        "log_count": log_count,
+    }
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def dashboard(request):
+    key = _dashboard_cache_key(request.user.id)
+    data = cache.get(key)
+    if data is None or data["today"] != _date_str(timezone.localdate()):
+        data = build_dashboard(request.user)
+        cache.set(key, data, getattr(settings, "DASHBOARD_CACHE_SECONDS", 30))
+    return Response(data, status=status.HTTP_200_OK)
+
+
+# ---------------------------
+# CALENDAR (dense per-day timeline for a window)
+# ---------------------------
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer])
+def calendar_range(request):
+    today = timezone.localdate()
+    raw_from = request.query_params.get("from")
+    raw_to = request.query_params.get("to")
+
+    try:
+        start = _parse_ymd(raw_from) if raw_from else today.replace(day=1)
+        end = _parse_ymd(raw_to) if raw_to else min(start + timedelta(days=41), TIMELINE_MAX_DATE)
+    except (ValueError, OverflowError):
+        return Response({"error": "from/to must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not (TIMELINE_MIN_DATE <= start and end <= TIMELINE_MAX_DATE):
+        return Response(
+            {"error": f"dates must be between {TIMELINE_MIN_DATE} and {TIMELINE_MAX_DATE}"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    if end < start:
+        return Response({"error": "to cannot be before from"}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days + 1 > MAX_WINDOW_DAYS:
+        return Response(
+            {"error": f"window cannot exceed {MAX_WINDOW_DAYS} days"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    days = build_timeline(request.user, start, end, today)
+    return Response(
+        {"from": start.isoformat(), "to": end.isoformat(), "days": days},
+        status=status.HTTP_200_OK,
+    )
+
+
+# ---------------------------
+# ANOMALIES (precomputed by core/anomalies.py)
+# ---------------------------
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def anomaly_list(request):
+    flags = anomalies.recent_flags(request.user, today=timezone.localdate())
+    for f in flags:
+        f["date"] = f["date"].isoformat()
+    return Response(flags, status=status.HTTP_200_OK)
+
+
 # ---------------------------
 # CHAT: history / clear / chatbot
 # ---------------------------
@@ -242,7 +434,8 @@ def delete_period_log(request, pk):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def chat_history(request):
-    msgs = ChatMessage.objects.filter(user=request.user).order_by("created_at")[:200]
+    flush_pending()
+    msgs = ChatMessage.objects.for_user(request.user).order_by("created_at", "id")[:200]
     data = [
         {"role": m.role, "content": m.content, "created_at": m.created_at}
         for m in msgs
@@ -253,7 +446,8 @@ def chat_history(request):
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def chat_clear(request):
-    ChatMessage.objects.filter(user=request.user).delete()
+    flush_pending()
+    clear_user(request.user)
     return Response({"message": "Chat cleared"}, status=status.HTTP_200_OK)
 
 
@@ -264,33 +458,26 @@ def chatbot(request):
     if not prompt:
         return Response({"error": "prompt is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Save user message
-    ChatMessage.objects.create(user=request.user, role="user", content=prompt)
+    # Both turns are saved together once the reply is known (core/chat_store.py)
 
-    user_context = build_user_context(request.user)
+    # Deterministic cycle questions are answered without the LLM
+    fast = fast_answer(request.user, prompt)
+    if fast:
+        intent, reply = fast
+        save_exchange(request.user, prompt, reply)
+        return Response({"reply": reply, "intent": intent}, status=status.HTTP_200_OK)
 
-    system_msg = (
-        "You are a helpful Period Tracker assistant.\n"
-        "Rules:\n"
-        "- Be supportive and medically cautious.\n"
-        "- You are not a doctor.\n"
-        "- If severe pain, heavy bleeding, fainting, fever, pregnancy concern, "
-        "or urgent symptoms: advise seeking a clinician.\n"
-        "- Personalize using the user context.\n"
-        "- Keep answers clear, short, and practical.\n"
-    )
-
-    user_text = f"USER CONTEXT:\n{user_context}\n\nUSER QUESTION:\n{prompt}"
-
-    reply, err = gemini_text(system_msg, user_text)
+    p = render_prompt("chatbot", build_user_context(request.user), question=prompt)
+    reply, err = llm_text(p.system, p.user, endpoint="chatbot", trimmed=p.dropped)
     if err:
-        ChatMessage.objects.create(user=request.user, role="assistant", content=f"[AI error] {err}")
+        # Failures go to AICallLog; only the user's turn is kept in history
+        save_exchange(request.user, prompt)
         return Response({"error": f"AI error: {err}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     if not reply:
         reply = "Sorry, I couldn’t generate a reply right now."
 
-    ChatMessage.objects.create(user=request.user, role="assistant", content=reply)
+    save_exchange(request.user, prompt, reply)
     return Response({"reply": reply}, status=status.HTTP_200_OK)
 
 
@@ -301,25 +488,17 @@ def chatbot(request):
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def ai_insights(request):
-    user_context = build_user_context(request.user)
-
-    system_msg = (
-        "You are a period-tracking insights assistant.\n"
-        "Rules:\n"
-        "- Use ONLY the given tracking data.\n"
-        "- Give 3–6 bullet insights.\n"
-        "- No diagnosis.\n"
-        "- Add 1 safety note if symptoms are severe or unusual.\n"
-        "- Friendly tone.\n"
-    )
+    flags = anomalies.recent_flags(request.user, today=timezone.localdate())
+    flagged = "".join(f"- {f['date']}: {f['detail']}\n" for f in flags) or "None\n"
 
-    prompt = f"Generate helpful cycle insights based on:\n{user_context}"
-
-    reply, err = gemini_text(system_msg, prompt)
+    sections = build_user_context(request.user)
+    sections.append(Section("flags", f"FLAGGED PATTERNS:\n{flagged}", 2))
+    p = render_prompt("insights", sections)
+    reply, err = llm_text(p.system, p.user, endpoint="insights", trimmed=p.dropped)
     if err:
         return Response({"error": err}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    return Response({"text": reply}, status=status.HTTP_200_OK)
+    return Response({"text": reply, "flags": len(flags)}, status=status.HTTP_200_OK)
 
 
 @api_view(["POST"])
@@ -331,19 +510,8 @@ def ai_mood_tip(request):
     if not mood:
         return Response({"error": "mood is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-    system_msg = (
-        "You are a supportive mood assistant for menstrual health.\n"
-        "Rules:\n"
-        "- Validate feelings.\n"
-        "- Give gentle coping tips.\n"
-        "- No diagnosis.\n"
-        "- Encourage rest and self-care.\n"
-        "- If the user mentions self-harm or feeling unsafe, suggest professional help.\n"
-    )
-
-    prompt = f"The user feels '{mood}' with intensity {intensity}. Give gentle advice."
-
-    reply, err = gemini_text(system_msg, prompt)
+    p = render_prompt("mood_tip", mood=mood, intensity=intensity)
+    reply, err = llm_text(p.system, p.user, endpoint="mood_tip", trimmed=p.dropped)
     if err:
         return Response({"error": err}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -354,41 +522,54 @@ def ai_mood_tip(request):
 @permission_classes([IsAuthenticated])
 def ai_symptom_tip(request):
     symptoms = request.data.get("symptoms", [])
+    severity = request.data.get("severity", 5)
+
     if not isinstance(symptoms, list):
-        return Response({"error": "symptoms must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"error": "symptoms must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
 
     symptoms = [str(s).strip() for s in symptoms if str(s).strip()]
     if not symptoms:
-        return Response({"error": "symptoms required"}, status=status.HTTP_400_BAD_REQUEST)
-
-    system_msg = (
-        "You are a menstrual symptom assistant.\n"
-        "Rules:\n"
-        "- Give general relief tips.\n"
-        "- No diagnosis.\n"
-        "- If severe symptoms are mentioned, advise seeing a clinician.\n"
-        "- Keep it short and practical.\n"
-    )
+        return Response({"error": "symptoms must be a non-empty list"}, status=status.HTTP_400_BAD_REQUEST)
 
-    prompt = f"User has symptoms: {', '.join(symptoms)}. Give general guidance."
-
-    reply, err = gemini_text(system_msg, prompt)
+    p = render_prompt("symptom_tip", symptoms=", ".join(symptoms), severity=severity)
+    reply, err = llm_text(p.system, p.user, endpoint="symptom_tip", trimmed=p.dropped)
     if err:
-        return Response({"error": err}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response({"error": f"AI error: {err}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     return Response({"text": reply}, status=status.HTTP_200_OK)
 
 
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def ai_health(request):
+    """
+    Upstream LLM health from AICallLog: error rates + latency percentiles,
+    plus the chatbot rule fast-path hit rate.
+    ?hours=24
+    """
+    try:
+        hours = max(1, min(int(request.query_params.get("hours", 24)), 24 * 30))
+    except ValueError:
+        return Response({"error": "hours must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+    data = summarize_ai_calls(hours)
+    data["chat_fast_path"] = fast_path_metrics()
+    return Response(data, status=status.HTTP_200_OK)
+
+
 # ---------------------------
 # MOOD LOGS
 # ---------------------------
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer])
 def mood_logs(request):
     if request.method == "GET":
-        logs = MoodLog.objects.filter(user=request.user).order_by("-date")
-        return Response(MoodLogSerializer(logs, many=True).data, status=status.HTTP_200_OK)
+        # ?layout=columns -> parallel arrays for calendar / chart views
+        logs = MoodLog.objects.for_user(request.user).order_by("-date")
+        data = fast_list(logs, MOOD_LOG_FIELDS, request.query_params.get("layout", "rows"))
+        return Response(data, status=status.HTTP_200_OK)
 
     ser = MoodLogSerializer(data=request.data)
     if not ser.is_valid():
@@ -402,41 +583,72 @@ def mood_logs(request):
             intensity=ser.validated_data.get("intensity", 5),
             note=ser.validated_data.get("note", ""),
         )
-        return Response(MoodLogSerializer(obj).data, status=status.HTTP_201_CREATED)
     except Exception:
         return Response({"error": "Mood for this date already exists."}, status=status.HTTP_400_BAD_REQUEST)
 
+    invalidate_dashboard(request.user.id)
+    mood_trends.on_mood_saved(request.user, obj)
+    return Response(MoodLogSerializer(obj).data, status=status.HTTP_201_CREATED)
+
 
 @api_view(["PUT", "DELETE"])
 @permission_classes([IsAuthenticated])
 def mood_log_detail(request, pk):
     try:
-        log = MoodLog.objects.get(pk=pk, user=request.user)
+        log = MoodLog.objects.for_user(request.user).get(pk=pk)
     except MoodLog.DoesNotExist:
         return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
 
     if request.method == "DELETE":
         log.delete()
+        invalidate_dashboard(request.user.id)
+        mood_trends.on_mood_deleted(request.user, log)
         return Response({"message": "Deleted"}, status=status.HTTP_200_OK)
 
+    old = (log.date, log.mood, log.intensity)
     ser = MoodLogSerializer(log, data=request.data, partial=True)
     if ser.is_valid():
         ser.save()
+        invalidate_dashboard(request.user.id)
+        mood_trends.on_mood_saved(request.user, log, old=old)
         return Response(ser.data, status=status.HTTP_200_OK)
 
     return Response(ser.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer])
+def mood_trend_series(request):
+    """
+    GET /api/mood-trends/?days=30
+    Chart-ready daily / weekly / per-phase series from precomputed MoodTrend rows.
+    """
+    try:
+        days = int(request.query_params.get("days", 30))
+    except ValueError:
+        return Response({"error": "days must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    if not 1 <= days <= mood_trends.MAX_DAYS:
+        return Response({"error": f"days must be between 1 and {mood_trends.MAX_DAYS}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    data = mood_trends.trends(request.user, timezone.localdate(), days)
+    return Response(data, status=status.HTTP_200_OK)
+
+
 # ---------------------------
 # SYMPTOM LOGS
 # ---------------------------
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
+@renderer_classes([ORJSONRenderer])
 def symptom_logs(request):
     if request.method == "GET":
-        logs = SymptomLog.objects.filter(user=request.user).order_by("-date")
-        return Response(SymptomLogSerializer(logs, many=True).data, status=status.HTTP_200_OK)
+        # ?layout=columns -> parallel arrays for calendar / chart views
+        logs = SymptomLog.objects.for_user(request.user).order_by("-date")
+        data = fast_list(logs, SYMPTOM_LOG_FIELDS, request.query_params.get("layout", "rows"))
+        return Response(data, status=status.HTTP_200_OK)
 
     ser = SymptomLogSerializer(data=request.data)
     if not ser.is_valid():
@@ -450,47 +662,23 @@ def symptom_logs(request):
             severity=ser.validated_data.get("severity", 5),
             note=ser.validated_data.get("note", ""),
         )
-        return Response(SymptomLogSerializer(obj).data, status=status.HTTP_201_CREATED)
-    except Exception:
+    except IntegrityError:
         return Response({"error": "Symptoms for this date already exist."}, status=status.HTTP_400_BAD_REQUEST)
 
+    invalidate_dashboard(request.user.id)
+    anomalies.on_symptom_log_changed(request.user, obj.date)
+    return Response(SymptomLogSerializer(obj).data, status=status.HTTP_201_CREATED)
+
 
 @api_view(["DELETE"])
 @permission_classes([IsAuthenticated])
 def delete_symptom_log(request, pk):
     try:
-        log = SymptomLog.objects.get(pk=pk, user=request.user)
+        log = SymptomLog.objects.for_user(request.user).get(pk=pk)
     except SymptomLog.DoesNotExist:
         return Response({"error": "Not found"}, status=status.HTTP_404_NOT_FOUND)
 
     log.delete()
+    invalidate_dashboard(request.user.id)
+    anomalies.on_symptom_log_changed(request.user, log.date)
     return Response({"message": "Deleted"}, status=status.HTTP_200_OK)
-@api_view(["POST"])
-@permission_classes([IsAuthenticated])
-def ai_symptom_tip(request):
-    symptoms = request.data.get("symptoms", [])
-    severity = request.data.get("severity", 5)
-
-    if not symptoms or not isinstance(symptoms, list):
-        return Response({"error": "symptoms must be a non-empty list"}, status=400)
-
-    system_msg = (
-        "You are a menstrual symptom relief assistant.\n"
-        "Rules:\n"
-        "- Give general relief tips (hydration, heat pad, rest, gentle stretching, OTC suggestions in general terms)\n"
-        "- No diagnosis\n"
-        "- If severity is high (8+), heavy bleeding, fainting, fever, pregnancy concern: advise seeing a doctor.\n"
-        "- Keep answer short and practical (5-8 bullet points).\n"
-    )
-
-    prompt = (
-        f"The user selected symptoms: {', '.join(symptoms)}.\n"
-        f"Severity level: {severity}/10.\n"
-        "Give general relief tips and one safety note."
-    )
-
-    reply, err = gemini_text(system_msg, prompt, model="gemini-2.5-flash")
-    if err:
-        return Response({"error": f"AI error: {err}"}, status=500)
-
-    return Response({"text": reply}, status=200)
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 load_dotenv()
@@ -63,6 +64,20 @@ DATABASES = {
     }
 }
 
+# User-id sharding of PeriodLog / MoodLog / SymptomLog / ChatMessage
+# (core/sharding.py). SHARD_COUNT=0 keeps everything in "default";
+# SHARD_COUNT=N adds N local SQLite shards under shards/ (created by
+# ShardRouter on first use).
+# Migrate each alias: manage.py migrate --database shard_0 ...
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0"))
+for _i in range(SHARD_COUNT):
+    DATABASES[f"shard_{_i}"] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / "shards" / f"shard_{_i}.sqlite3",
+    }
+USER_SHARDS = [f"shard_{i}" for i in range(SHARD_COUNT)] or ["default"]
+DATABASE_ROUTERS = ["core.sharding.ShardRouter"]
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -83,9 +98,119 @@ CORS_ALLOW_ALL_ORIGINS = True
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "core.tokens.ExpiringTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
-}
\ No newline at end of file
+}
+
+# Set REDIS_URL in production: token revocation, login throttling and shard
+# placement are then shared by all workers instead of per process.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Per-user dashboard cache (seconds). Writes invalidate it immediately.
+DASHBOARD_CACHE_SECONDS = 30
+
+# Chat history retention, enforced by `manage.py compact_chat`.
+# Messages beyond the newest max_messages or older than max_days are moved
+# into compressed ChatArchive rows; deletes run in batch_size chunks.
+CHAT_RETENTION = {
+    "max_messages": 500,
+    "max_days": 365,
+    "batch_size": 500,
+}
+
+# AICallLog rows older than this are removed by `manage.py rotate_ai_logs`.
+AI_CALL_LOG_KEEP_DAYS = 30
+
+# LLM provider: "gemini", "local" (deterministic, offline), "record" or "replay".
+# `models` routes endpoints to a model; cheap tip endpoints use a faster one.
+# `budgets`: max estimated input tokens per endpoint (core/prompts.py trims
+# user-context sections to fit). `context_cache`: explicit Gemini caching of
+# the static system prefix; only used for prefixes of at least min_tokens.
+LLM = {
+    "provider": os.getenv("LLM_PROVIDER", "gemini"),
+    "default_model": os.getenv("GEMINI_MODEL", "gemini-2.5-flash"),
+    "models": {
+        "mood_tip": os.getenv("LLM_TIP_MODEL", "gemini-2.5-flash-lite"),
+        "symptom_tip": os.getenv("LLM_TIP_MODEL", "gemini-2.5-flash-lite"),
+    },
+    "budgets": {
+        "chatbot": 1500,
+        "insights": 1200,
+        "mood_tip": 400,
+        "symptom_tip": 400,
+    },
+    "context_cache": {
+        "enabled": os.getenv("LLM_CONTEXT_CACHE", "") == "1",
+        "ttl_seconds": 3600,
+        "min_tokens": 1024,
+    },
+    "record_inner": "gemini",
+    "record_path": os.getenv("LLM_RECORD_PATH", str(BASE_DIR / "llm_recordings.jsonl")),
+}
+
+# Local ML model artifact (`manage.py train_cycle_model`), memory-mapped per worker.
+ML_MODEL_DIR = BASE_DIR / "ml_model"
+
+# Chatbot persistence: "sync" commits both turns before replying,
+# "buffered" queues them and flushes in groups (may lose <= flush_interval on crash).
+CHAT_PERSISTENCE = {
+    "mode": os.getenv("CHAT_PERSISTENCE_MODE", "sync"),
+    "flush_size": 50,
+    "flush_interval": 0.5,
+}
+
+# Password hashing. PBKDF2 work factor is configurable; hashes with a
+# different iteration count (or an older algorithm below) are rehashed on
+# the next successful login. Unset = Django's default iteration count;
+# values below core.hashers.MIN_ITERATIONS are raised to it.
+# Measure with `manage.py bench_logins` before changing it.
+PASSWORD_HASHERS = [
+    "core.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "0")) or None
+
+# Login / register protection (core/auth_guard.py): at most `workers` password
+# hashes run at once per process and `max_pending` more callers wait (then
+# 503); request threads still wait for their own hash. Per IP `ip_attempts`
+# and per username `username_failures` within `window` seconds (then 429).
+AUTH_PROTECTION = {
+    "workers": int(os.getenv("AUTH_HASH_WORKERS", "2")),
+    "max_pending": 16,
+    "timeout": 10,
+    "window": 300,
+    "ip_attempts": 30,
+    "username_failures": 5,
+}
+
+# API tokens (core/tokens.py): sliding expiry of ttl_days from last use,
+# never beyond max_age_days after login. Cached lookups; last_used is
+# written at most every touch_interval seconds per token, in batches.
+# Without a shared cache, a logout reaches other workers after cache_seconds.
+AUTH_TOKENS = {
+    "ttl_days": 30,
+    "max_age_days": 90,
+    "cache_seconds": 30,
+    "negative_cache_seconds": 30,
+    "touch_interval": 300,
+    "flush_interval": 5.0,
+}
+
@@ -3,7 +3,11 @@ from django.urls import path
 from core.views import (
     register_user,
     login_user,
+    logout_user,
     profile,
+    dashboard,
+    calendar_range,
+    anomaly_list,
     period_logs,
     delete_period_log,
     chat_history,
@@ -12,10 +16,12 @@ from core.views import (
     ai_insights,
     mood_logs,
     mood_log_detail,
+    mood_trend_series,
     symptom_logs,
     delete_symptom_log,
     ai_mood_tip,
     ai_symptom_tip,
+    ai_health,
 )
 
 urlpatterns = [
@@ -24,10 +30,20 @@ urlpatterns = [
     # Auth
     path("api/register/", register_user),
     path("api/login/", login_user),
+    path("api/logout/", logout_user),
 
     # Profile
     path("api/profile/", profile),
 
+    # Dashboard (home screen in one request)
+    path("api/dashboard/", dashboard),
+
+    # Calendar (per-day timeline for ?from=&to=)
+    path("api/calendar/", calendar_range),
+
+    # Anomaly flags (cycle/period length, symptom spikes)
+    path("api/anomalies/", anomaly_list),
+
     # Period logs
     path("api/period-logs/", period_logs),
     path("api/period-logs/<int:pk>/", delete_period_log),
@@ -41,13 +57,14 @@ urlpatterns = [
     path("api/ai/insights/", ai_insights),
     path("api/ai/mood/", ai_mood_tip),
     path("api/ai/symptoms/", ai_symptom_tip),
+    path("api/ai/health/", ai_health),
 
     path("api/mood-logs/", mood_logs),
     path("api/mood-logs/<int:pk>/", mood_log_detail),
+    path("api/mood-trends/", mood_trend_series),
 
     # Symptom logs
     path("api/symptom-logs/", symptom_logs),
     path("api/symptom-logs/<int:pk>/", delete_symptom_log),
-    path("api/ai/symptoms/", ai_symptom_tip),
 
 ]
@@ -14,9 +14,7 @@ async function loadNavbar() {
     if (logoutBtn) {
       logoutBtn.addEventListener("click", (e) => {
         e.preventDefault();
-        localStorage.removeItem("token");
-        localStorage.removeItem("username");
-        window.location.href = "login.html";
+        logout();
       });
     }
   } catch (err) {
@@ -19,12 +19,21 @@ function requireAuth() {
   return true;
 }
 
-function logout() {
+function clearSession() {
   localStorage.removeItem("token");
   localStorage.removeItem("username");
   window.location.href = "login.html";
 }
 
+function logout() {
+  // revoke the token server-side; keepalive lets it finish during navigation
+  if (getToken()) {
+    fetch(withBase("/api/logout/"), { method: "POST", headers: authHeaders(), keepalive: true })
+      .catch(() => {});
+  }
+  clearSession();
+}
+
 function authHeaders(json = true) {
   const token = getToken();
   const headers = { Authorization: `Token ${token}` };
@@ -59,6 +68,11 @@ async function fetchJSON(pathOrUrl, options = {}) {
     data = null;
   }
 
+  // token expired or revoked
+  if (res.status === 401 && getToken()) {
+    clearSession();
+  }
+
   if (!res.ok) {
     throw new Error(
       (data && (data.error || data.detail)) || `Request failed (${res.status})`
@@ -28,103 +28,14 @@ document.addEventListener("DOMContentLoaded", async () => {
     return `${y}-${m}-${day}`;
   };
 
-  const parseYMD = (s) => {
-    const [y, m, d] = s.split("-").map(Number);
-    return new Date(y, m - 1, d);
-  };
-
-  const addDays = (d, n) => {
-    const x = new Date(d);
-    x.setDate(x.getDate() + n);
-    return x;
-  };
-
-  const daysBetween = (a, b) =>
-    Math.round((b - a) / (1000 * 60 * 60 * 24));
-
-  const avg = (arr) => {
-    if (!arr.length) return null;
-    return Math.round((arr.reduce((x, y) => x + y, 0) / arr.length) * 10) / 10;
-  };
-
-  function rangeDatesSet(start, end) {
-    const out = new Set();
-    let d = new Date(start);
-    while (d <= end) {
-      out.add(ymd(d));
-      d.setDate(d.getDate() + 1);
-    }
-    return out;
-  }
-
-  async function loadLogs() {
-    return await fetchJSON("/api/period-logs/", {
+  // Server returns one entry per day: period/flow, predicted, fertile, ovulation, mood, symptoms
+  async function loadTimeline(from, to) {
+    return await fetchJSON(`/api/calendar/?from=${from}&to=${to}`, {
       method: "GET",
       headers: authHeaders(),
     });
   }
 
-  function buildCalendarMarks(logs) {
-    const periodDays = new Set();
-    const fertileDays = new Set();
-    let ovulationKey = null;
-    let nextPeriodKey = null;
-
-    if (!Array.isArray(logs) || logs.length === 0) {
-      return { periodDays, fertileDays, ovulationKey, nextPeriodKey };
-    }
-
-    // sort oldest -> newest
-    const sorted = [...logs].sort((a, b) =>
-      (a.start_date || "").localeCompare(b.start_date || "")
-    );
-
-    // PERIOD days
-    sorted.forEach((log) => {
-      if (!log.start_date || !log.end_date) return;
-      const s = parseYMD(log.start_date);
-      const e = parseYMD(log.end_date);
-      const set = rangeDatesSet(s, e);
-      set.forEach((d) => periodDays.add(d));
-    });
-
-    // Average cycle length
-    const manualCycles = sorted
-      .map((l) => Number(l.cycle_length))
-      .filter((n) => Number.isFinite(n) && n > 0);
-
-    const computedCycles = [];
-    for (let i = 0; i < sorted.length - 1; i++) {
-      if (!sorted[i].start_date || !sorted[i + 1].start_date) continue;
-      const s1 = parseYMD(sorted[i].start_date);
-      const s2 = parseYMD(sorted[i + 1].start_date);
-      const diff = daysBetween(s1, s2);
-      if (diff > 0 && diff < 60) computedCycles.push(diff);
-    }
-
-    const avgCycle = avg(manualCycles.length >= 2 ? manualCycles : computedCycles) || 28;
-
-    // Use last start date for predictions
-    const lastStart = parseYMD(sorted[sorted.length - 1].start_date);
-
-    // Next period estimate
-    const nextPeriod = addDays(lastStart, Math.round(avgCycle));
-    nextPeriodKey = ymd(nextPeriod);
-
-    // Ovulation estimate (avgCycle - 14)
-    const ovOffset = Math.max(10, Math.round(avgCycle) - 14);
-    const ovDate = addDays(lastStart, ovOffset);
-    ovulationKey = ymd(ovDate);
-
-    // Fertile window: ovulation -5 to ovulation +1
-    const fertileStart = addDays(ovDate, -5);
-    const fertileEnd = addDays(ovDate, 1);
-    const fertileSet = rangeDatesSet(fertileStart, fertileEnd);
-    fertileSet.forEach((d) => fertileDays.add(d));
-
-    return { periodDays, fertileDays, ovulationKey, nextPeriodKey };
-  }
-
   async function render() {
     setMsg("");
     grid.innerHTML = "";
@@ -159,16 +70,10 @@ document.addEventListener("DOMContentLoaded", async () => {
       grid.appendChild(blank);
     }
 
-    let marks = {
-      periodDays: new Set(),
-      fertileDays: new Set(),
-      ovulationKey: null,
-      nextPeriodKey: null,
-    };
-
+    const byDate = {};
     try {
-      const logs = await loadLogs();
-      marks = buildCalendarMarks(logs);
+      const data = await loadTimeline(ymd(first), ymd(new Date(year, month, daysInMonth)));
+      data.days.forEach((d) => { byDate[d.date] = d; });
     } catch (e) {
       setMsg(e.message || "Failed to load logs.");
     }
@@ -182,10 +87,11 @@ document.addEventListener("DOMContentLoaded", async () => {
       cell.innerText = day;
 
       // Order matters (so important markers win visually)
-      if (marks.fertileDays.has(key)) cell.classList.add("fertile-day");
-      if (marks.ovulationKey === key) cell.classList.add("ovulation-day");
-      if (marks.nextPeriodKey === key) cell.classList.add("next-period-day");
-      if (marks.periodDays.has(key)) cell.classList.add("period-day");
+      const info = byDate[key];
+      if (info?.fertile) cell.classList.add("fertile-day");
+      if (info?.ovulation) cell.classList.add("ovulation-day");
+      if (info?.predicted_period) cell.classList.add("next-period-day");
+      if (info?.period) cell.classList.add("period-day");
 
       grid.appendChild(cell);
     }